@@ -17,6 +17,8 @@ Submodules
     pip_shims.utils
     pip_shims.shims
     pip_shims.environment
+    pip_shims.parallel
+    pip_shims.aio
 
 """
 from __future__ import absolute_import
@@ -41,6 +43,7 @@ module.__dict__.update(
         "__file__": __file__,
         "__package__": "pip_shims",
         "__path__": __path__,
+        "__spec__": __spec__,
         "__doc__": __doc__,
         "__all__": module.__all__ + ["shims"],
         "__version__": __version__,
@@ -0,0 +1,238 @@
+# -*- coding=utf-8 -*-
+"""
+Coroutine versions of the blocking pip-shims entry points for use with asyncio.
+"""
+from __future__ import absolute_import
+
+import asyncio
+import atexit
+import concurrent.futures
+import functools
+import threading
+import weakref
+
+from .environment import MYPY_RUNNING
+
+if MYPY_RUNNING:
+    from typing import Any, Callable, Dict, Optional
+
+
+DEFAULT_LIMITS = {
+    "get_package_finder": 8,
+}
+
+# These operations enter state pip keeps for the whole process, such as the global
+# temporary directory manager and the requirement tracker's environment variable,
+# so only one of them runs at a time in the process
+GLOBAL_STATE_OPERATIONS = frozenset(["resolve", "build_wheel", "shim_unpack"])
+_global_state_lock = threading.Lock()
+
+
+def _run_with_global_state(func, *args, **kwargs):
+    # type: (Callable, Any, Any) -> Any
+    with _global_state_lock:
+        return func(*args, **kwargs)
+
+
+def _call_shim(name, *args, **kwargs):
+    # type: (str, Any, Any) -> Any
+    from . import shims
+
+    return getattr(shims, name)(*args, **kwargs)
+
+
+def _build_wheel(*args, **kwargs):
+    # type: (Any, Any) -> Any
+    builder = _call_shim("build_wheel", *args, **kwargs)
+    try:
+        return next(builder)
+    finally:
+        # Closing the generator cleans up the wheel cache and preparer it entered
+        builder.close()
+
+
+class AsyncRunner(object):
+    """
+    Runs blocking pip-shims operations on a managed thread pool for asyncio callers.
+
+    Each operation has its own concurrency limit, any calls beyond it wait for a slot.
+    Operations in :data:`GLOBAL_STATE_OPERATIONS` share a single slot instead, and
+    run one at a time across every runner in the process.
+    Operations share the pooled sessions and cached finders used by the blocking
+    entry points. A *timeout* covers both waiting for a slot and running the
+    operation. Cancelling a call, or reaching its deadline, cancels the work if it
+    hasn't started yet; work already running in a thread is left to finish in the
+    background and keeps its slot until it does.
+
+    :param Optional[int] max_workers: The number of worker threads when the runner
+        manages its own executor
+    :param Optional[Dict[str, int]] limits: Concurrency limits per operation, merged
+        into :data:`DEFAULT_LIMITS`
+    :param executor: An executor to use instead of a managed thread pool, it is not
+        shut down by :meth:`close`
+    """
+
+    def __init__(self, max_workers=None, limits=None, executor=None):
+        # type: (Optional[int], Optional[Dict[str, int]], Any) -> None
+        self.max_workers = max_workers
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self._executor = executor
+        self._owns_executor = executor is None
+        # Semaphores belong to an event loop, so keep a set for each loop
+        self._semaphores = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # type: () -> concurrent.futures.Executor
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="pip-shims-aio"
+                )
+            return self._executor
+
+    def _get_semaphore(self, loop, operation):
+        # type: (asyncio.AbstractEventLoop, str) -> Optional[asyncio.Semaphore]
+        if operation in GLOBAL_STATE_OPERATIONS:
+            # Waiting happens here rather than on the lock, so queued calls don't
+            # tie up executor threads
+            operation, limit = "global_state", 1
+        else:
+            limit = self.limits.get(operation)
+        if limit is None:
+            return None
+        semaphores = self._semaphores.setdefault(loop, {})
+        if operation not in semaphores:
+            semaphores[operation] = asyncio.Semaphore(limit)
+        return semaphores[operation]
+
+    async def _call(self, operation, func, args, kwargs):
+        # type: (str, Callable, Any, Dict[str, Any]) -> Any
+        loop = asyncio.get_event_loop()
+        semaphore = self._get_semaphore(loop, operation)
+        if operation in GLOBAL_STATE_OPERATIONS:
+            func = functools.partial(_run_with_global_state, func)
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            future = self._get_executor().submit(func, *args, **kwargs)
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        if semaphore is not None:
+
+            def release(_):
+                try:
+                    loop.call_soon_threadsafe(semaphore.release)
+                except RuntimeError:  # the loop has been closed
+                    pass
+
+            future.add_done_callback(release)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    async def run(self, operation, func, *args, timeout=None, **kwargs):
+        # type: (str, Callable, Any, Optional[float], Any) -> Any
+        """
+        Run a blocking callable on the executor under the limit for **operation**.
+
+        :param str operation: The name of the operation whose limit applies
+        :param Callable func: The blocking callable to run
+        :param Optional[float] timeout: Seconds to wait before giving up, defaults to
+            waiting forever
+        :raises asyncio.TimeoutError: If the deadline is reached
+        :return: The result of the callable
+        """
+        return await asyncio.wait_for(
+            self._call(operation, func, args, kwargs), timeout=timeout
+        )
+
+    async def get_package_finder(self, *args, timeout=None, **kwargs):
+        # type: (Any, Optional[float], Any) -> Any
+        """Coroutine version of :func:`~pip_shims.compat.get_package_finder`."""
+        func = functools.partial(_call_shim, "get_package_finder")
+        return await self.run(
+            "get_package_finder", func, *args, timeout=timeout, **kwargs
+        )
+
+    async def resolve(self, *args, timeout=None, **kwargs):
+        # type: (Any, Optional[float], Any) -> Any
+        """Coroutine version of :func:`~pip_shims.compat.resolve`."""
+        func = functools.partial(_call_shim, "resolve")
+        return await self.run("resolve", func, *args, timeout=timeout, **kwargs)
+
+    async def build_wheel(self, *args, timeout=None, **kwargs):
+        # type: (Any, Optional[float], Any) -> Any
+        """
+        Coroutine version of :func:`~pip_shims.compat.build_wheel`.
+
+        Returns the first result of the blocking generator rather than the generator.
+        """
+        return await self.run(
+            "build_wheel", _build_wheel, *args, timeout=timeout, **kwargs
+        )
+
+    async def shim_unpack(self, *args, timeout=None, **kwargs):
+        # type: (Any, Optional[float], Any) -> Any
+        """Coroutine version of :func:`~pip_shims.compat.shim_unpack`."""
+        func = functools.partial(_call_shim, "shim_unpack")
+        return await self.run("shim_unpack", func, *args, timeout=timeout, **kwargs)
+
+    def close(self, wait=True):
+        # type: (bool) -> None
+        """Shut down the managed executor, if the runner created one."""
+        if not self._owns_executor:
+            return
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_runner = AsyncRunner()
+
+
+@atexit.register
+def _close_runner():
+    # type: () -> None
+    _runner.close(wait=False)
+
+
+def get_runner():
+    # type: () -> AsyncRunner
+    return _runner
+
+
+def set_runner(runner):
+    # type: (AsyncRunner) -> AsyncRunner
+    """
+    Replace the runner used by the module level coroutines, closing the previous one.
+
+    :param AsyncRunner runner: The new runner
+    :return: The previous runner
+    :rtype: AsyncRunner
+    """
+    global _runner
+    previous, _runner = _runner, runner
+    previous.close(wait=False)
+    return previous
+
+
+async def get_package_finder(*args, timeout=None, **kwargs):
+    # type: (Any, Optional[float], Any) -> Any
+    return await get_runner().get_package_finder(*args, timeout=timeout, **kwargs)
+
+
+async def resolve(*args, timeout=None, **kwargs):
+    # type: (Any, Optional[float], Any) -> Any
+    return await get_runner().resolve(*args, timeout=timeout, **kwargs)
+
+
+async def build_wheel(*args, timeout=None, **kwargs):
+    # type: (Any, Optional[float], Any) -> Any
+    return await get_runner().build_wheel(*args, timeout=timeout, **kwargs)
+
+
+async def shim_unpack(*args, timeout=None, **kwargs):
+    # type: (Any, Optional[float], Any) -> Any
+    return await get_runner().shim_unpack(*args, timeout=timeout, **kwargs)
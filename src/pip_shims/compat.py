@@ -3,22 +3,38 @@ Backports and helper functionality to support using new functionality.
 """
 
 import atexit
+import collections
+import concurrent.futures
 import contextlib
+import copy
 import functools
-import inspect
+import hashlib
+import itertools
+import json
+import multiprocessing
 import os
+import pathlib
 import re
+import shutil
 import sys
+import tempfile
+import threading
+import time
 import types
-from tempfile import TemporaryDirectory
+import weakref
+from tempfile import TemporaryDirectory, mkstemp
 
 from packaging import specifiers
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
 
 from .environment import MYPY_RUNNING
 from .utils import (
+    LRUCache,
     call_function_with_correct_args,
     filter_allowed_args,
     get_allowed_args,
+    get_call_adapter,
     get_method_args,
     nullcontext,
     suppress_setattr,
@@ -30,6 +46,7 @@ if MYPY_RUNNING:
         Any,
         Callable,
         Dict,
+        FrozenSet,
         Generator,
         Generic,
         Iterable,
@@ -117,17 +134,22 @@ class TargetPython(object):
         self.py_version_info = py_version_info
         self._valid_tags = None
 
+    def _compute_tags(self):
+        fallback_func = resolve_possible_shim(self.fallback_get_tags)
+        versions = None
+        if self._given_py_version_info:
+            versions = ["".join(map(str, self._given_py_version_info[:2]))]
+        return fallback_func(
+            versions=versions,
+            platform=self.platform,
+            abi=self.abi,
+            impl=self.implementation,
+        )
+
     def get_tags(self):
         if self._valid_tags is None and self.fallback_get_tags:
-            fallback_func = resolve_possible_shim(self.fallback_get_tags)
-            versions = None
-            if self._given_py_version_info:
-                versions = ["".join(map(str, self._given_py_version_info[:2]))]
-            self._valid_tags = fallback_func(
-                versions=versions,
-                platform=self.platform,
-                abi=self.abi,
-                impl=self.implementation,
+            self._valid_tags = _get_cached_tags(
+                get_tags_cache_key(self), self._compute_tags
             )
         return self._valid_tags
 
@@ -213,6 +235,187 @@ class InvalidWheelFilename(Exception):
     """Wheel Filename is Invalid"""
 
 
+class TagPriority(object):
+    """
+    Ranks PEP 425 tags by their position in a list of supported tags.
+
+    Looking up a tag's rank takes constant time, where searching the list of supported
+    tags takes time proportional to its length. Tags may be tuples of strings or
+    :class:`packaging.tags.Tag` instances.
+
+    :param tags: The supported tags, in order with most preferred first
+    """
+
+    __slots__ = ("tags", "_ranks")
+
+    def __init__(self, tags):
+        # type: (Iterable[Any]) -> None
+        self.tags = tuple(tags)
+        ranks = {}  # type: Dict[Tuple[str, str, str], int]
+        for rank, tag in enumerate(self.tags):
+            ranks.setdefault(_get_tag_key(tag), rank)
+        self._ranks = ranks
+
+    @classmethod
+    def for_tags(cls, tags):
+        # type: (Union[TagPriority, Iterable[Any]]) -> TagPriority
+        """
+        Get the priority map for **tags**, reusing the one built last time the same
+        list of tags was passed.
+
+        :param tags: The supported tags, in order with most preferred first
+        :rtype: TagPriority
+        """
+        if isinstance(tags, cls):
+            return tags
+        entry = _tag_priority_cache.get(id(tags))
+        if entry is not None and entry[0] is tags:
+            return entry[1]
+        priority = cls(tags)
+        _tag_priority_cache.set(id(tags), (tags, priority))
+        return priority
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.tags)
+
+    def __contains__(self, tag):
+        # type: (Any) -> bool
+        return _get_tag_key(tag) in self._ranks
+
+    def rank(self, tag):
+        # type: (Any) -> Optional[int]
+        """Return the rank of **tag**, or ``None`` if it isn't supported."""
+        return self._ranks.get(_get_tag_key(tag))
+
+    def best_rank(self, file_tags):
+        # type: (Iterable[Any]) -> Optional[int]
+        """
+        Return the lowest rank any of **file_tags** achieves.
+
+        :param file_tags: The tags of a single wheel
+        :return: The lowest rank, or ``None`` if none of the tags are supported
+        :rtype: Optional[int]
+        """
+        ranks = self._ranks
+        best = None
+        for tag in file_tags:
+            rank = ranks.get(_get_tag_key(tag))
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+    def supports(self, file_tags):
+        # type: (Iterable[Any]) -> bool
+        """Return whether any of **file_tags** is supported."""
+        ranks = self._ranks
+        return any(_get_tag_key(tag) in ranks for tag in file_tags)
+
+    def rank_wheels(self, wheels):
+        # type: (Iterable[Any]) -> List[Optional[int]]
+        """
+        Rank many wheels at once.
+
+        :param wheels: Wheel instances with a ``file_tags`` attribute
+        :return: The best rank of each wheel, ``None`` for unsupported wheels
+        :rtype: List[Optional[int]]
+        """
+        return [self.best_rank(wheel.file_tags) for wheel in wheels]
+
+    def sort_wheels(self, wheels):
+        # type: (Iterable[Any]) -> List[Any]
+        """
+        Sort the supported wheels from most to least preferred, dropping the rest.
+
+        :param wheels: Wheel instances with a ``file_tags`` attribute
+        :return: The supported wheels, most preferred first
+        :rtype: List[Any]
+        """
+        wheels = list(wheels)
+        ranked = [
+            (rank, index, wheel)
+            for index, (wheel, rank) in enumerate(zip(wheels, self.rank_wheels(wheels)))
+            if rank is not None
+        ]
+        return [wheel for _, _, wheel in sorted(ranked, key=lambda item: item[:2])]
+
+
+_tags_cache = LRUCache(maxsize=64)
+
+
+def get_tags_cache_key(target_python):
+    # type: (Any) -> Tuple[Any, ...]
+    """
+    Build the key the supported tags of **target_python** are cached under.
+
+    :param target_python: A :class:`~pip._internal.models.target_python.TargetPython`
+        or :class:`TargetPython` instance
+    :return: A key made of the target python's type, platforms, abis, implementation
+        and the python version it was given
+    :rtype: Tuple[Any, ...]
+    """
+    return (
+        type(target_python),
+        _freeze(getattr(target_python, "platforms", None)),
+        getattr(target_python, "platform", None),
+        _freeze(getattr(target_python, "abis", None)),
+        getattr(target_python, "abi", None),
+        getattr(target_python, "implementation", None),
+        _freeze(getattr(target_python, "_given_py_version_info", None)),
+    )
+
+
+def _get_cached_tags(key, compute):
+    # type: (Tuple[Any, ...], Callable[[], Optional[Iterable[Any]]]) -> Optional[Tuple[Any, ...]]  # noqa
+    tags = _tags_cache.get(key)
+    if tags is None:
+        computed = compute()
+        if computed is None:
+            return None
+        tags = tuple(computed)
+        _tags_cache.set(key, tags)
+    return tags
+
+
+def get_target_python_tags(target_python):
+    # type: (Any) -> Optional[Tuple[Any, ...]]
+    """
+    Get the supported tags of **target_python** from a process-wide cache.
+
+    Target pythons with the same platforms, abis, implementation and python version
+    share one immutable tuple of tags, which is also stored on **target_python** so
+    that pip reuses it.
+
+    :param target_python: A :class:`~pip._internal.models.target_python.TargetPython`
+        or :class:`TargetPython` instance
+    :return: The supported tags, most preferred first
+    :rtype: Optional[Tuple[Any, ...]]
+    """
+    tags = getattr(target_python, "_valid_tags", None)
+    if tags is not None:
+        return tags
+    tags = _get_cached_tags(get_tags_cache_key(target_python), target_python.get_tags)
+    if tags is not None and hasattr(target_python, "_valid_tags"):
+        target_python._valid_tags = tags
+    return tags
+
+
+def clear_tags_cache():
+    # type: () -> None
+    """Forget every cached list of supported tags."""
+    _tags_cache.clear()
+
+
+def _get_tag_key(tag):
+    # type: (Any) -> Tuple[str, str, str]
+    if isinstance(tag, tuple):
+        return tag
+    return (tag.interpreter, tag.abi, tag.platform)
+
+
+_tag_priority_cache = LRUCache(maxsize=32)
+
+
 class Wheel(object):
     wheel_file_re = re.compile(
         r"""^(?P<namever>(?P<name>.+?)-(?P<ver>.*?))
@@ -262,7 +465,10 @@ class Wheel(object):
         :raises ValueError: If none of the wheel's file tags match one of
             the supported tags.
         """
-        return min(tags.index(tag) for tag in self.file_tags if tag in tags)
+        rank = TagPriority.for_tags(tags).best_rank(self.file_tags)
+        if rank is None:
+            raise ValueError("None of the wheel's tags are supported")
+        return rank
 
     def supported(self, tags):
         # type: (List[Any]) -> bool
@@ -271,7 +477,114 @@ class Wheel(object):
 
         :param tags: the PEP 425 tags to check the wheel against.
         """
-        return not self.file_tags.isdisjoint(tags)
+        return TagPriority.for_tags(tags).supports(self.file_tags)
+
+
+class WheelInfo(object):
+    """
+    A compact record of a parsed wheel filename, see :func:`parse_wheel_filenames`.
+
+    Offers the same attributes and tag methods as :class:`Wheel`, but the tag
+    components are interned tuples shared between records and the ``file_tags``
+    combinations are only built when they are first needed.
+    """
+
+    __slots__ = (
+        "filename",
+        "name",
+        "version",
+        "build_tag",
+        "pyversions",
+        "abis",
+        "plats",
+        "_file_tags",
+    )
+
+    def __init__(self, filename, name, version, build_tag, pyversions, abis, plats):
+        # type: (str, str, str, Optional[str], Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]) -> None  # noqa
+        self.filename = filename
+        self.name = name
+        self.version = version
+        self.build_tag = build_tag
+        self.pyversions = pyversions
+        self.abis = abis
+        self.plats = plats
+        self._file_tags = None  # type: Optional[FrozenSet[Tuple[str, str, str]]]
+
+    def __repr__(self):
+        # type: () -> str
+        return "<WheelInfo {!r}>".format(self.filename)
+
+    @property
+    def file_tags(self):
+        # type: () -> FrozenSet[Tuple[str, str, str]]
+        if self._file_tags is None:
+            self._file_tags = frozenset(
+                (x, y, z) for x in self.pyversions for y in self.abis for z in self.plats
+            )
+        return self._file_tags
+
+    get_formatted_file_tags = Wheel.get_formatted_file_tags
+    support_index_min = Wheel.support_index_min
+    supported = Wheel.supported
+
+
+def _split_wheel_filename(filename):
+    # type: (str) -> Optional[Tuple[str, str, Optional[str], str, str, str]]
+    if filename.endswith(".whl"):
+        parts = filename[:-4].split("-")
+        if len(parts) == 5 and all(parts):
+            name, version, pyver, abi, plat = parts
+            return name, version, None, pyver, abi, plat
+        if len(parts) == 6 and all(parts) and parts[2][0].isdigit():
+            return tuple(parts)  # type: ignore
+    match = Wheel.wheel_file_re.match(filename)
+    if not match or not filename.endswith(".whl"):
+        return None
+    return match.group("name", "ver", "build", "pyver", "abi", "plat")
+
+
+def parse_wheel_filenames(filenames, skip_invalid=False):
+    # type: (Iterable[str], bool) -> List[WheelInfo]
+    """
+    Parse many wheel filenames into compact :class:`WheelInfo` records.
+
+    :param Iterable[str] filenames: The wheel filenames to parse
+    :param bool skip_invalid: Whether to leave out invalid filenames rather than
+        raising, defaults to False
+    :raises InvalidWheelFilename: If a filename is invalid and **skip_invalid** is
+        *False*
+    :return: A record for each valid filename, in order
+    :rtype: List[WheelInfo]
+    """
+    intern = sys.intern
+    components = {}  # type: Dict[str, Tuple[str, ...]]
+    results = []
+    for filename in filenames:
+        parts = _split_wheel_filename(filename)
+        if parts is None:
+            if skip_invalid:
+                continue
+            raise InvalidWheelFilename("%s is not a valid wheel filename." % filename)
+        name, version, build_tag, pyver, abi, plat = parts
+        tags = []
+        for component in (pyver, abi, plat):
+            split = components.get(component)
+            if split is None:
+                split = components[component] = tuple(
+                    intern(value) for value in component.split(".")
+                )
+            tags.append(split)
+        results.append(
+            WheelInfo(
+                filename,
+                intern(name.replace("_", "-")),
+                version.replace("_", "-"),
+                build_tag,
+                *tags,
+            )
+        )
+    return results
 
 
 def resolve_possible_shim(target):
@@ -305,6 +618,7 @@ def get_tracker(tracker_creator=None, tracker_type="REQ"):
         env_var = "PIP_BUILD_TRACKER"
         prefix = "build-tracker"
     root = os.environ.get(env_var)
+    tracker_creator = resolve_possible_shim(tracker_creator)
     if not tracker_creator:
         yield None
     else:
@@ -323,28 +637,243 @@ def get_tracker(tracker_creator=None, tracker_type="REQ"):
                 yield tracker
 
 
+RESOLUTION_DIRS = ("build_dir", "src_dir", "download_dir", "wheel_download_dir")
+
+
+class ScratchDirectoryPool(object):
+    """
+    A pool of pre-created scratch directories for resolving and building requirements.
+
+    Each scratch root holds an empty directory for every name in **subdirs**. A root
+    is reset when its lease ends by renaming whatever was written to it out of the
+    way, so it can be leased again straight away, while the renamed trees are deleted
+    on a background thread. The thread exits as soon as there is nothing left to
+    delete, so it doesn't stop :func:`build_many_in_parallel` from forking. Roots are
+    created beneath a single pool directory in **base_dir**, which can be placed on a
+    fast filesystem such as a tmpfs.
+
+    :param Optional[str] base_dir: The directory to create the pool directory in,
+        defaults to ``PIP_SHIMS_SCRATCH_DIR`` or the system temporary directory
+    :param int maxsize: The maximum number of idle roots to keep, defaults to 8
+    :param subdirs: The names of the directories to create in each root
+    """
+
+    def __init__(self, base_dir=None, maxsize=8, subdirs=RESOLUTION_DIRS):
+        # type: (Optional[str], int, Iterable[str]) -> None
+        self.base_dir = base_dir
+        self.maxsize = maxsize
+        self.subdirs = tuple(subdirs)
+        self._directory = None  # type: Optional[str]
+        self._idle = []  # type: List[str]
+        self._counter = itertools.count()
+        self._trash = []  # type: List[str]
+        self._cleaner = None  # type: Optional[threading.Thread]
+        self._cleaning = False
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._idle)
+
+    def _get_directory(self):
+        # type: () -> str
+        if self._pid != os.getpid():
+            # A forked child must never lease the roots its parent is using
+            self._pid = os.getpid()
+            self._directory, self._idle, self._trash = None, [], []
+            self._cleaner, self._cleaning = None, False
+        if self._directory is None:
+            base_dir = self.base_dir or os.environ.get("PIP_SHIMS_SCRATCH_DIR")
+            if base_dir is not None:
+                os.makedirs(base_dir, exist_ok=True)
+            self._directory = tempfile.mkdtemp(prefix="pip-shims-scratch-", dir=base_dir)
+            os.mkdir(os.path.join(self._directory, ".trash"))
+        return self._directory
+
+    def _get_path(self, prefix):
+        # type: (str) -> str
+        name = "{0}-{1}".format(prefix, next(self._counter))
+        if prefix == "trash":
+            return os.path.join(self._get_directory(), ".trash", name)
+        return os.path.join(self._get_directory(), name)
+
+    def _discard(self, path):
+        # type: (str) -> None
+        trash = self._get_path("trash")
+        os.rename(path, trash)
+        self._trash.append(trash)
+        if not self._cleaning:
+            self._cleaning = True
+            self._cleaner = threading.Thread(
+                target=self._empty_trash,
+                args=(self._cleaner,),
+                name="pip-shims-scratch",
+                daemon=True,
+            )
+            self._cleaner.start()
+
+    def _empty_trash(self, previous):
+        # type: (Optional[threading.Thread]) -> None
+        # Joining the previous thread means joining the latest one joins them all
+        if previous is not None:
+            previous.join()
+        while True:
+            with self._lock:
+                if not self._trash:
+                    self._cleaning = False
+                    return
+                trash = self._trash.pop()
+            shutil.rmtree(trash, ignore_errors=True)
+
+    def _reset(self, root):
+        # type: (str) -> None
+        with os.scandir(root) as entries:
+            for entry in list(entries):
+                if entry.name in self.subdirs and entry.is_dir(follow_symlinks=False):
+                    with os.scandir(entry.path) as contents:
+                        if next(contents, None) is None:
+                            continue
+                self._discard(entry.path)
+        for name in self.subdirs:
+            path = os.path.join(root, name)
+            if not os.path.isdir(path):
+                os.mkdir(path)
+
+    def acquire(self):
+        # type: () -> str
+        """
+        Take an idle scratch root from the pool, creating one if none are idle.
+
+        :return: The path to a scratch root holding an empty directory for each subdir
+        :rtype: str
+        """
+        with self._lock:
+            self._get_directory()
+            if self._idle:
+                return self._idle.pop()
+            root = self._get_path("root")
+        os.mkdir(root)
+        for name in self.subdirs:
+            os.mkdir(os.path.join(root, name))
+        return root
+
+    def release(self, root):
+        # type: (str) -> None
+        """
+        Reset a scratch root and return it to the pool, or discard it if the pool is
+        full or it can't be reset.
+
+        :param str root: A scratch root returned by :meth:`acquire`
+        """
+        with self._lock:
+            if self._directory is None or os.path.dirname(root) != self._directory:
+                # The pool was closed, or forked, while the root was leased
+                return
+            try:
+                if len(self._idle) >= self.maxsize:
+                    self._discard(root)
+                    return
+                self._reset(root)
+            except OSError:
+                if os.path.exists(root):
+                    self._discard(root)
+                return
+            self._idle.append(root)
+
+    def wait(self):
+        # type: () -> None
+        """Wait until every discarded tree has been deleted and the thread has exited."""
+        with self._lock:
+            cleaner = self._cleaner
+        if cleaner is not None and cleaner is not threading.current_thread():
+            cleaner.join()
+
+    @contextlib.contextmanager
+    def lease(self):
+        # type: () -> Iterator[Dict[str, str]]
+        """
+        Lease a scratch root for the duration of the context.
+
+        :return: A mapping of each subdir name to its path within the leased root
+        :rtype: Dict[str, str]
+        """
+        root = self.acquire()
+        try:
+            yield {name: os.path.join(root, name) for name in self.subdirs}
+        finally:
+            self.release(root)
+
+    def close(self, wait=True):
+        # type: (bool) -> None
+        """Remove the pool directory, including any idle and leased roots."""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            directory, self._directory = self._directory, None
+            if not wait:
+                self._trash = []
+            self._idle = []
+        if wait:
+            self.wait()
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+_scratch_pool = ScratchDirectoryPool()
+
+
+@atexit.register
+def _close_scratch_pool():
+    # type: () -> None
+    _scratch_pool.close()
+
+
+def get_scratch_pool():
+    # type: () -> ScratchDirectoryPool
+    return _scratch_pool
+
+
+def set_scratch_pool(pool):
+    # type: (ScratchDirectoryPool) -> ScratchDirectoryPool
+    """
+    Replace the scratch directory pool used by default, closing the previous one.
+
+    :param ScratchDirectoryPool pool: The new pool
+    :return: The previous pool
+    :rtype: ScratchDirectoryPool
+    """
+    global _scratch_pool
+    previous, _scratch_pool = _scratch_pool, pool
+    previous.close(wait=False)
+    return previous
+
+
 @contextlib.contextmanager
-def ensure_resolution_dirs(**kwargs):
-    # type: (Any) -> Iterator[Dict[str, Any]]
+def ensure_resolution_dirs(scratch_pool=None, **kwargs):
+    # type: (Optional[ScratchDirectoryPool], Any) -> Iterator[Dict[str, Any]]
     """
     Ensures that the proper directories are scaffolded and present in the provided kwargs
     for performing dependency resolution via pip.
 
+    Missing directories are leased from a :class:`ScratchDirectoryPool` for the
+    duration of the context.
+
+    :param Optional[ScratchDirectoryPool] scratch_pool: The pool to lease directories
+        from, defaults to the shared pool from :func:`get_scratch_pool`
     :return: A new kwargs dictionary with scaffolded directories for **build_dir**, **src_dir**,
         **download_dir**, and **wheel_download_dir** added to the key value pairs.
     :rtype: Dict[str, Any]
     """
-    keys = ("build_dir", "src_dir", "download_dir", "wheel_download_dir")
-    if not any(kwargs.get(key) is None for key in keys):
+    if not any(kwargs.get(key) is None for key in RESOLUTION_DIRS):
         yield kwargs
     else:
-        with TemporaryDirectory(prefix="pip-shims-") as base_dir:
-            for key in keys:
-                if kwargs.get(key) is not None:
-                    continue
-                target = os.path.join(base_dir, key)
-                os.makedirs(target)
-                kwargs[key] = target
+        if scratch_pool is None:
+            scratch_pool = get_scratch_pool()
+        with scratch_pool.lease() as scratch_dirs:
+            for key in RESOLUTION_DIRS:
+                if kwargs.get(key) is None:
+                    kwargs[key] = scratch_dirs[key]
             yield kwargs
 
 
@@ -418,20 +947,291 @@ def partial_command(shimmed_path, cmd_mapping=None):
     return result
 
 
+_IGNORED_ENV_VARS = ("PIP_REQ_TRACKER", "PIP_BUILD_TRACKER")
+_install_commands = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+_default_options = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+_install_command_lock = threading.RLock()
+
+
+def _get_mtime(path):
+    # type: (str) -> Optional[int]
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_config_fingerprint(install_cmd):
+    # type: (TCommandInstance) -> Tuple[Tuple[Tuple[str, str], ...], Tuple[Any, ...]]
+    """
+    Fingerprint the inputs pip reads when parsing default options for a command.
+
+    :param install_cmd: The command whose configuration should be fingerprinted
+    :return: The ``PIP_*`` environment variables and the modification times of the
+        pip configuration files the command would read
+    :rtype: Tuple[Tuple[Tuple[str, str], ...], Tuple[Any, ...]]
+    """
+    env = tuple(
+        sorted(
+            (key, value)
+            for key, value in os.environ.items()
+            if key.startswith("PIP_") and key not in _IGNORED_ENV_VARS
+        )
+    )
+    config = getattr(getattr(install_cmd, "parser", None), "config", None)
+    iter_config_files = getattr(config, "iter_config_files", None) or getattr(
+        config, "_iter_config_files", None
+    )
+    config_files = []  # type: List[Tuple[str, Optional[int]]]
+    if iter_config_files is not None:
+        for _, paths in iter_config_files():
+            config_files.extend((path, _get_mtime(path)) for path in paths)
+    return env, tuple(config_files)
+
+
+def _copy_options(options):
+    # type: (Values) -> Values
+    clone = copy.copy(options)
+    for key, value in vars(options).items():
+        if isinstance(value, (list, dict, set)):
+            setattr(clone, key, copy.copy(value))
+    if getattr(options, "format_control", None) is not None:
+        clone.format_control = copy.deepcopy(options.format_control)
+    return clone
+
+
+def get_install_command(install_cmd_provider):
+    # type: (TShimmedFunc) -> TCommandInstance
+    """
+    Get a shared install command instance for **install_cmd_provider**.
+
+    :param install_cmd_provider: A shim for providing new install command instances.
+    :type install_cmd_provider: :class:`~pip_shims.models.ShimmedPathCollection`
+    :return: An install command, built once per provider
+    :rtype: :class:`~pip._internal.commands.install.InstallCommand`
+    """
+    install_cmd_provider = resolve_possible_shim(install_cmd_provider)
+    assert isinstance(install_cmd_provider, (type, functools.partial))
+    with _install_command_lock:
+        install_cmd = _install_commands.get(install_cmd_provider)
+        if install_cmd is None:
+            install_cmd = install_cmd_provider()
+            _install_commands[install_cmd_provider] = install_cmd
+    return install_cmd
+
+
+def get_default_options(install_cmd):
+    # type: (TCommandInstance) -> Values
+    """
+    Get the default parsed options of **install_cmd**.
+
+    Options are parsed once per command and parsed again only when the ``PIP_*``
+    environment variables or the pip configuration files change. Each caller gets its
+    own copy, with list, dict and set values and the format control copied as well,
+    so it may be modified freely.
+
+    :param install_cmd: The command to parse default options for
+    :return: A copy of the default options
+    :rtype: :class:`~optparse.Values`
+    """
+    fingerprint = get_config_fingerprint(install_cmd)
+    with _install_command_lock:
+        entry = _default_options.get(install_cmd)
+        if entry is None or entry[0] != fingerprint:
+            options, _ = install_cmd.parser.parse_args([])  # type: ignore
+            entry = _default_options[install_cmd] = (fingerprint, options)
+    return _copy_options(entry[1])
+
+
+def clear_install_command_cache():
+    # type: () -> None
+    """Forget all shared install commands and their parsed default options."""
+    with _install_command_lock:
+        _install_commands.clear()
+        _default_options.clear()
+
+
+def _freeze(value):
+    # type: (Any) -> Any
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class SessionPool(object):
+    """
+    A bounded pool of pip sessions keyed by the options which shape a session.
+
+    Sessions built from options with the same index urls, trusted hosts, certificates,
+    proxy, retries, timeout and cache directory are shared, so repeated operations
+    reuse warm keep-alive connections. When the pool is full the least recently used
+    session is dropped from it, as is any session left unused for longer than
+    **idle_timeout** seconds. Dropped sessions aren't closed because callers may still
+    be using them, their connections are released once the last caller lets go.
+
+    :param int maxsize: The maximum number of sessions to keep open, defaults to 8
+    :param Optional[float] idle_timeout: Seconds after which an unused session is
+        dropped from the pool, defaults to 300, ``None`` keeps sessions until they
+        are evicted
+    """
+
+    fingerprint_options = (
+        "index_url",
+        "extra_index_urls",
+        "trusted_hosts",
+        "cert",
+        "client_cert",
+        "proxy",
+        "retries",
+        "timeout",
+        "cache_dir",
+        "no_input",
+        "keyring_provider",
+    )
+
+    def __init__(self, maxsize=8, idle_timeout=300.0):
+        # type: (int, Optional[float]) -> None
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._sessions = collections.OrderedDict()  # type: Dict[Tuple, List[Any]]
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __len__(self):
+        # type: () -> int
+        self._check_pid()
+        return len(self._sessions)
+
+    def _check_pid(self):
+        # type: () -> None
+        if self._pid != os.getpid():
+            # A forked child inherits the parent's sessions and their open sockets,
+            # which the parent keeps using, so they're dropped without closing them
+            self._pid = os.getpid()
+            self._sessions = collections.OrderedDict()
+            self._lock = threading.Lock()
+
+    @classmethod
+    def fingerprint(cls, options):
+        # type: (Values) -> Tuple[Any, ...]
+        return tuple(
+            _freeze(getattr(options, name, None)) for name in cls.fingerprint_options
+        )
+
+    def _evict(self, now):
+        # type: (float) -> None
+        if self.idle_timeout is not None:
+            for key, (_, last_used) in list(self._sessions.items()):
+                if now - last_used > self.idle_timeout:
+                    del self._sessions[key]
+        while len(self._sessions) > self.maxsize:
+            self._sessions.popitem(last=False)
+
+    def get(self, install_cmd, options):
+        # type: (TCommandInstance, Values) -> TSession
+        """
+        Get a pooled session for **options**, building one if needed.
+
+        :param install_cmd: The command used to build new sessions
+        :param Values options: The options the session should be built from
+        :return: A shared session
+        :rtype: :class:`~pip._internal.network.session.PipSession`
+        """
+        self._check_pid()
+        key = self.fingerprint(options)
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(key)
+            if entry is not None:
+                entry[1] = now
+                self._sessions.move_to_end(key)
+        if entry is not None:
+            return entry[0]
+        session = install_cmd._build_session(options)  # type: ignore
+        assert session is not None
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                self._sessions[key] = [session, now]
+                self._evict(now)
+        if entry is not None:
+            # another thread built a session for the same options first
+            session.close()
+            return entry[0]
+        return session
+
+    def close(self):
+        # type: () -> None
+        """Close every pooled session and empty the pool."""
+        self._check_pid()
+        with self._lock:
+            sessions = [session for session, _ in self._sessions.values()]
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+_session_pool = SessionPool()
+
+
+@atexit.register
+def _close_session_pool():
+    # type: () -> None
+    _session_pool.close()
+
+
+def get_session_pool():
+    # type: () -> SessionPool
+    return _session_pool
+
+
+def set_session_pool(pool):
+    # type: (SessionPool) -> SessionPool
+    """
+    Replace the session pool used by default, closing the previous one.
+
+    :param SessionPool pool: The new pool
+    :return: The previous pool
+    :rtype: SessionPool
+    """
+    global _session_pool
+    previous, _session_pool = _session_pool, pool
+    previous.close()
+    return previous
+
+
 def get_session(
     install_cmd_provider=None,  # type: Optional[TShimmedFunc]
     install_cmd=None,  # type: TCommandInstance
     options=None,  # type: Optional[Values]
+    session_pool=None,  # type: Optional[SessionPool]
+    pooled=True,  # type: bool
 ):
     # type: (...) -> TSession
+    """
+    Get a pip session, reusing a pooled session built from equivalent options.
+
+    :param install_cmd_provider: A shim for providing new install command instances.
+    :param install_cmd: The install command used to build the session
+    :param Optional[Values] options: The options to build the session from
+    :param Optional[SessionPool] session_pool: The pool to draw from, defaults to the
+        shared pool from :func:`get_session_pool`
+    :param bool pooled: Whether to use a pool at all, when *False* a new session is
+        built and closed at exit, defaults to True
+    :return: A pip session
+    :rtype: :class:`~pip._internal.network.session.PipSession`
+    """
     session = None  # type: Optional[TSession]
     if install_cmd is None:
         assert install_cmd_provider is not None
-        install_cmd_provider = resolve_possible_shim(install_cmd_provider)
-        assert isinstance(install_cmd_provider, (type, functools.partial))
-        install_cmd = install_cmd_provider()
+        install_cmd = get_install_command(install_cmd_provider)
     if options is None:
-        options, _ = install_cmd.parser.parse_args([])  # type: ignore
+        options = get_default_options(install_cmd)
+    if pooled:
+        if session_pool is None:
+            session_pool = get_session_pool()
+        return session_pool.get(install_cmd, options)
     session = install_cmd._build_session(options)  # type: ignore
     assert session is not None
     atexit.register(session.close)
@@ -448,7 +1248,7 @@ def populate_options(
     if install_command is None and options is None:
         raise TypeError("Must pass either options or InstallCommand to populate options")
     if options is None and install_command is not None:
-        options, _ = install_command.parser.parse_args([])  # type: ignore
+        options = get_default_options(install_command)
     options_dict = options.__dict__
     for provided_key, provided_value in kwargs.items():
         if provided_key == "isolated":
@@ -542,12 +1342,8 @@ def get_requirement_set(
     wheel_cache_provider = resolve_possible_shim(wheel_cache_provider)
     req_set_provider = resolve_possible_shim(req_set_provider)
     if install_command is None:
-        install_cmd_provider = resolve_possible_shim(install_cmd_provider)
-        assert isinstance(install_cmd_provider, (type, functools.partial))
-        install_command = install_cmd_provider()
-    required_args = inspect.getargs(
-        req_set_provider.__init__.__code__
-    ).args  # type: ignore
+        install_command = get_install_command(install_cmd_provider)
+    req_set_adapter = get_call_adapter(req_set_provider.__init__)  # type: ignore
     results, options = populate_options(
         install_command,
         options,
@@ -565,7 +1361,7 @@ def get_requirement_set(
         require_hashes=require_hashes,
         cache_dir=cache_dir,
     )
-    if session is None and "session" in required_args:
+    if session is None and req_set_adapter.accepts("session"):
         session = get_session(install_cmd=install_command, options=options)
     with contextlib.ExitStack() as stack:
         if wheel_cache is None:
@@ -576,6 +1372,92 @@ def get_requirement_set(
         return call_function_with_correct_args(req_set_provider, **results)
 
 
+_FINDER_OPTIONS = (
+    "index_url",
+    "extra_index_urls",
+    "no_index",
+    "find_links",
+    "pre",
+    "prefer_binary",
+    "ignore_requires_python",
+)
+_TARGET_PYTHON_ATTRS = (
+    "platforms",
+    "platform",
+    "abis",
+    "abi",
+    "implementation",
+    "py_version_info",
+)
+_finder_cache = LRUCache(maxsize=16)
+
+
+def get_finder_cache():
+    # type: () -> LRUCache
+    return _finder_cache
+
+
+def clear_finder_cache():
+    # type: () -> None
+    """Forget every package finder cached by :func:`get_package_finder`."""
+    _finder_cache.clear()
+
+
+def _get_format_control_key(format_control):
+    # type: (Optional[TFormatControl]) -> Optional[Tuple[Tuple[str, ...], ...]]
+    if format_control is None:
+        return None
+    return tuple(
+        tuple(sorted(getattr(format_control, name, None) or ()))
+        for name in ("no_binary", "only_binary")
+    )
+
+
+def _get_target_python_key(target_python):
+    # type: (Optional[Any]) -> Optional[Tuple[Any, ...]]
+    if target_python is None:
+        return None
+    return tuple(
+        _freeze(getattr(target_python, attr, None)) for attr in _TARGET_PYTHON_ATTRS
+    )
+
+
+def get_finder_cache_key(
+    options,  # type: Values
+    session,  # type: TSession
+    platform=None,  # type: Optional[str]
+    python_versions=None,  # type: Optional[Iterable[str]]
+    abi=None,  # type: Optional[str]
+    implementation=None,  # type: Optional[str]
+    target_python=None,  # type: Optional[Any]
+    ignore_requires_python=None,  # type: Optional[bool]
+    candidate_cache=None,  # type: Optional[CandidateCache]
+):
+    # type: (...) -> Tuple[Any, ...]
+    """
+    Build the key :func:`get_package_finder` caches finders under.
+
+    Finders built from the same index urls, find links, format control, target python,
+    session and candidate cache share a key. Finders wrapped by a candidate cache are
+    never shared with callers that didn't ask for it.
+
+    :return: A hashable key
+    :rtype: Tuple[Any, ...]
+    """
+    return (
+        tuple(_freeze(getattr(options, name, None)) for name in _FINDER_OPTIONS),
+        _get_format_control_key(getattr(options, "format_control", None)),
+        platform,
+        tuple(sorted(python_versions)) if python_versions else None,
+        abi,
+        implementation,
+        _get_target_python_key(target_python),
+        ignore_requires_python,
+        session,
+        candidate_cache,
+    )
+
+
 def get_package_finder(
     install_cmd=None,  # type: Optional[TCommand]
     options=None,  # type: Optional[Values]
@@ -588,6 +1470,9 @@ def get_package_finder(
     ignore_requires_python=None,  # type: Optional[bool]
     target_python_builder=None,  # type: Optional[TShimmedFunc]
     install_cmd_provider=None,  # type: Optional[TShimmedFunc]
+    finder_cache=None,  # type: Optional[LRUCache]
+    cached=True,  # type: bool
+    candidate_cache=None,  # type: Optional[CandidateCache]
 ):
     # type: (...) -> TFinder
     """Shim for compatibility to generate package finders.
@@ -616,6 +1501,13 @@ def get_package_finder(
         on resulting candidates, only valid after pip version 19.3.1
     :param target_python_builder: A 'TargetPython' builder (e.g. the class itself,
         uninstantiated)
+    :param Optional[LRUCache] finder_cache: The cache to share finders through, defaults
+        to the cache from :func:`get_finder_cache`
+    :param bool cached: Whether to share finders at all, when *False* a new finder is
+        always built, defaults to True
+    :param Optional[CandidateCache] candidate_cache: A cache to discover candidates
+        through, see :meth:`CandidateCache.wrap`. Finders wrapped by it are cached
+        separately from the finders built without it
     :return: A :class:`pip._internal.index.package_finder.PackageFinder` instance
     :rtype: :class:`pip._internal.index.package_finder.PackageFinder`
 
@@ -636,19 +1528,36 @@ def get_package_finder(
     a590f48c010551dc6c4b31 (from https://pypi.org/simple/requests/) (requires-python:>=2.
     7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*)>)>
     """
+    target_python_builder = resolve_possible_shim(target_python_builder)
     if install_cmd is None:
-        install_cmd_provider = resolve_possible_shim(install_cmd_provider)
-        assert isinstance(install_cmd_provider, (type, functools.partial))
-        install_cmd = install_cmd_provider()
+        install_cmd = get_install_command(install_cmd_provider)
     if options is None:
-        options, _ = install_cmd.parser.parse_args([])  # type: ignore
+        options = get_default_options(install_cmd)
     if session is None:
         session = get_session(install_cmd=install_cmd, options=options)  # type: ignore
-    builder_args = inspect.getargs(
-        install_cmd._build_package_finder.__code__
-    )  # type: ignore
+    cache_key = None
+    if cached:
+        if finder_cache is None:
+            finder_cache = get_finder_cache()
+        cache_key = get_finder_cache_key(
+            options,
+            session,
+            platform=platform,
+            python_versions=python_versions,
+            abi=abi,
+            implementation=implementation,
+            target_python=target_python,
+            ignore_requires_python=ignore_requires_python,
+            candidate_cache=candidate_cache,
+        )
+        finder = finder_cache.get(cache_key)
+        if finder is not None:
+            # Cached under the candidate cache, so it is already wrapped by it
+            return finder
+    build_finder = install_cmd._build_package_finder  # type: ignore
+    builder_adapter = get_call_adapter(build_finder)
     build_kwargs = {"options": options, "session": session}
-    expects_targetpython = "target_python" in builder_args.args
+    expects_targetpython = builder_adapter.accepts("target_python")
     received_python = any(arg for arg in [platform, python_versions, abi, implementation])
     if expects_targetpython and received_python and not target_python:
         if target_python_builder is None:
@@ -668,13 +1577,14 @@ def get_package_finder(
         target_python = call_function_with_correct_args(
             target_python_builder, **target_python_args
         )
+        get_target_python_tags(target_python)
         build_kwargs["target_python"] = target_python
     elif any(
-        arg in builder_args.args
+        builder_adapter.accepts(arg)
         for arg in ["platform", "python_versions", "abi", "implementation"]
     ):
         if target_python and not received_python:
-            tags = target_python.get_tags()
+            tags = get_target_python_tags(target_python)
             version_impl = {t[0] for t in tags}
             versions = {v[2:] for v in version_impl}
             build_kwargs.update(
@@ -685,12 +1595,298 @@ def get_package_finder(
                     "implementation": target_python.implementation,
                 }
             )
-    if (
-        ignore_requires_python is not None
-        and "ignore_requires_python" in builder_args.args
+    if ignore_requires_python is not None and builder_adapter.accepts(
+        "ignore_requires_python"
     ):
         build_kwargs["ignore_requires_python"] = ignore_requires_python
-    return install_cmd._build_package_finder(**build_kwargs)  # type: ignore
+    finder = builder_adapter(build_finder, **build_kwargs)
+    if cache_key is not None:
+        finder_cache.set(cache_key, finder)
+    if candidate_cache is not None:
+        candidate_cache.wrap(finder)
+    return finder
+
+
+class CandidateCache(object):
+    """
+    A cache of the candidates a package finder discovers for each project.
+
+    Wrapping a finder with :meth:`wrap` replaces its ``find_all_candidates`` method.
+    Candidate lists are kept in memory and, if **cache_dir** is provided, on disk as
+    compact JSON, keyed by the finder's index urls, find links, target python and
+    format control. Lookups within **ttl** seconds of the candidates being fetched
+    never reach the finder, so they never touch the network or parse index pages.
+    Expired entries are fetched again through the finder, whose session revalidates
+    the index page with the server using pip's http cache.
+
+    :param Optional[str] cache_dir: The directory to store candidates in, defaults to
+        keeping them in memory only
+    :param Optional[float] ttl: Seconds before cached candidates expire, defaults to 600,
+        ``None`` never expires them
+    :param int maxsize: The maximum number of projects to keep in memory
+    :param TShimmedFunc candidate_provider: A shim for building installation candidates
+    :param TShimmedFunc link_provider: A shim for building links
+    """
+
+    def __init__(
+        self,
+        cache_dir=None,  # type: Optional[str]
+        ttl=600.0,  # type: Optional[float]
+        maxsize=1024,  # type: int
+        candidate_provider=None,  # type: Optional[TShimmedFunc]
+        link_provider=None,  # type: Optional[TShimmedFunc]
+    ):
+        # type: (...) -> None
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.candidate_provider = candidate_provider
+        self.link_provider = link_provider
+        self._memory = LRUCache(maxsize=maxsize)
+
+    @staticmethod
+    def get_index_key(finder):
+        # type: (TFinder) -> str
+        """
+        Get the key candidates found by **finder** are stored under.
+
+        :param finder: A package finder
+        :return: A hex digest of everything which affects the candidates found
+        :rtype: str
+        """
+        search_scope = getattr(finder, "search_scope", None) or finder
+        target_python = getattr(finder, "target_python", None) or getattr(
+            finder, "_target_python", None
+        )
+        key = [
+            list(getattr(search_scope, "index_urls", None) or ()),
+            list(getattr(search_scope, "find_links", None) or ()),
+            _get_target_python_key(target_python),
+            _get_format_control_key(getattr(finder, "format_control", None)),
+            getattr(finder, "_ignore_requires_python", None),
+            getattr(finder, "_allow_yanked", None),
+        ]
+        encoded = json.dumps(key, default=str, sort_keys=True).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()
+
+    def _get_path(self, index_key, project_name):
+        # type: (str, str) -> Optional[str]
+        if self.cache_dir is None:
+            return None
+        return os.path.join(
+            self.cache_dir, index_key[:16], "{}.json".format(project_name)
+        )
+
+    def _is_fresh(self, created):
+        # type: (float) -> bool
+        return self.ttl is None or time.time() - created < self.ttl
+
+    def _dump(self, candidate):
+        # type: (Any) -> List[Optional[str]]
+        link = candidate.link
+        comes_from = getattr(link, "comes_from", None)
+        comes_from = getattr(comes_from, "url", comes_from)
+        return [
+            getattr(candidate, "name", None) or getattr(candidate, "project", None),
+            str(candidate.version),
+            link.url,
+            getattr(link, "requires_python", None),
+            getattr(link, "yanked_reason", None),
+            comes_from if isinstance(comes_from, str) else None,
+        ]
+
+    def _load(self, entries):
+        # type: (List[List[Optional[str]]]) -> List[Any]
+        candidate_provider = resolve_possible_shim(self.candidate_provider)
+        link_provider = resolve_possible_shim(self.link_provider)
+        link_adapter = get_call_adapter(link_provider.__init__)  # type: ignore
+        candidates = []
+        for name, version, url, requires_python, yanked_reason, comes_from in entries:
+            link = link_adapter(
+                link_provider,
+                url=url,
+                comes_from=comes_from,
+                requires_python=requires_python,
+                yanked_reason=yanked_reason,
+            )
+            candidates.append(candidate_provider(name, version, link))  # type: ignore
+        return candidates
+
+    def get(self, index_key, project_name):
+        # type: (str, str) -> Optional[List[Any]]
+        """
+        Get the cached candidates for **project_name**, if they haven't expired.
+
+        :param str index_key: The key from :meth:`get_index_key`
+        :param str project_name: The name of the project
+        :return: The cached candidates, if any
+        :rtype: Optional[List[:class:`~pip._internal.models.candidate.InstallationCandidate`]]
+        """
+        project_name = canonicalize_name(project_name)
+        entry = self._memory.get((index_key, project_name))
+        if entry is not None and self._is_fresh(entry[0]):
+            return list(entry[1])
+        path = self._get_path(index_key, project_name)
+        if path is None:
+            return None
+        try:
+            with open(path, "r") as fh:
+                contents = json.load(fh)
+            created = contents["created"]
+            if not self._is_fresh(created):
+                return None
+            candidates = self._load(contents["candidates"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        self._memory.set((index_key, project_name), (created, candidates))
+        return list(candidates)
+
+    def set(self, index_key, project_name, candidates):
+        # type: (str, str, List[Any]) -> None
+        """
+        Cache the candidates found for **project_name**.
+
+        :param str index_key: The key from :meth:`get_index_key`
+        :param str project_name: The name of the project
+        :param candidates: The candidates found by the finder
+        """
+        project_name = canonicalize_name(project_name)
+        created = time.time()
+        candidates = list(candidates)
+        self._memory.set((index_key, project_name), (created, candidates))
+        path = self._get_path(index_key, project_name)
+        if path is None:
+            return
+        contents = {
+            "created": created,
+            "candidates": [self._dump(candidate) for candidate in candidates],
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w") as fh:
+                json.dump(contents, fh, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except OSError:
+            return
+
+    def clear(self):
+        # type: () -> None
+        """Forget the candidates held in memory, the on-disk cache is left in place."""
+        self._memory.clear()
+
+    def wrap(self, finder):
+        # type: (TFinder) -> TFinder
+        """
+        Route **finder**'s candidate discovery through this cache.
+
+        :param finder: A package finder
+        :return: The same finder
+        :rtype: :class:`~pip._internal.index.package_finder.PackageFinder`
+        """
+        find_all_candidates = finder.__dict__.get(
+            "_uncached_find_all_candidates", finder.find_all_candidates
+        )
+        index_key = self.get_index_key(finder)
+
+        def cached_find_all_candidates(project_name):
+            # type: (str) -> List[Any]
+            candidates = self.get(index_key, project_name)
+            if candidates is None:
+                candidates = find_all_candidates(project_name)
+                self.set(index_key, project_name, candidates)
+            return candidates
+
+        finder._uncached_find_all_candidates = find_all_candidates
+        finder.find_all_candidates = cached_find_all_candidates
+        return finder
+
+
+StreamedDownload = collections.namedtuple(
+    "StreamedDownload", ["path", "content_type", "digests"]
+)
+
+_STREAM_CHUNK_SIZE = 256 * 1024
+
+
+def _is_streamable(link):
+    # type: (Any) -> bool
+    return getattr(link, "scheme", None) in ("http", "https") and not getattr(
+        link, "is_vcs", False
+    )
+
+
+def stream_download(
+    link,  # type: Any
+    download_dir,  # type: str
+    session,  # type: Any
+    hashes=None,  # type: Optional[Any]
+    hash_names=None,  # type: Optional[Iterable[str]]
+    favorite_hash_provider=None,  # type: Optional[TShimmedFunc]
+    chunk_size=_STREAM_CHUNK_SIZE,  # type: int
+):
+    # type: (...) -> StreamedDownload
+    """
+    Download a link into **download_dir**, hashing its bytes as they are written.
+
+    The file is written under a temporary name and only moved to its final name once
+    it has been verified, so pip's unpack path can then pick it up from the download
+    directory without reading it again to check its hashes.
+
+    :param :class:`~pip._internal.models.link.Link` link: The link to download
+    :param str download_dir: The directory to download the file to
+    :param `~requests.Session` session: A PipSession instance
+    :param Optional[Any] hashes: A Hashes instance to verify the download against,
+        defaults to None
+    :param Optional[Iterable[str]] hash_names: The hash algorithms to compute digests
+        for, defaults to pip's ``FAVORITE_HASH``
+    :param Optional[TShimmedFunc] favorite_hash_provider: A shim for pip's
+        ``FAVORITE_HASH``
+    :param int chunk_size: The number of bytes to read from the response at a time
+    :raises HashMismatch: If none of the allowed hashes match the download
+    :return: The path of the downloaded file, its content type and a mapping of
+        hash names to hex digests
+    :rtype: StreamedDownload
+    """
+    if hash_names is None:
+        favorite_hash = resolve_possible_shim(favorite_hash_provider) or "sha256"
+        hash_names = [favorite_hash]
+    hashers = {name: hashlib.new(name) for name in hash_names}
+    target_url = link.url.split("#", 1)[0]
+    # Ask for the raw bytes so the digests are computed over the file as published
+    response = session.get(
+        target_url, headers={"Accept-Encoding": "identity"}, stream=True
+    )
+    try:
+        response.raise_for_status()
+        download_path = os.path.join(download_dir, link.filename)
+        fd, temp_path = mkstemp(prefix=".tmp-", suffix=".download", dir=download_dir)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+
+                def chunks():
+                    # type: () -> Iterator[bytes]
+                    for chunk in response.raw.stream(chunk_size, decode_content=False):
+                        fh.write(chunk)
+                        for hasher in hashers.values():
+                            hasher.update(chunk)
+                        yield chunk
+
+                if hashes:
+                    hashes.check_against_chunks(chunks())
+                else:
+                    for _ in chunks():
+                        pass
+            os.replace(temp_path, download_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    finally:
+        response.close()
+    return StreamedDownload(
+        download_path,
+        response.headers.get("content-type", ""),
+        {name: hasher.hexdigest() for name, hasher in hashers.items()},
+    )
 
 
 def shim_unpack(
@@ -706,6 +1902,9 @@ def shim_unpack(
     downloader_provider=None,  # type: Optional[TShimmedFunc]
     session=None,  # type: Optional[Any]
     verbosity=0,  # type: Optional[int]
+    stream_hashes=False,  # type: bool
+    favorite_hash_provider=None,  # type: Optional[TShimmedFunc]
+    stream_downloader=None,  # type: Optional[Callable]
 ):
     # (...) -> None
     """
@@ -734,13 +1933,21 @@ def shim_unpack(
     :param Optional[`~requests.Session`] session: A PipSession instance, defaults to
         None.
     :param Optional[int] verbosity: 1 or 0 to indicate verbosity flag, defaults to 0.
+    :param bool stream_hashes: Whether to download http links into **download_dir**
+        with :func:`stream_download`, verifying their hashes as they are written
+        rather than reading the file again afterwards, defaults to False.
+    :param Optional[TShimmedFunc] favorite_hash_provider: A shim for pip's
+        ``FAVORITE_HASH``, used when streaming hashes.
+    :param Optional[Callable] stream_downloader: A callable accepting the same
+        arguments as :func:`stream_download` to stream downloads with instead,
+        defaults to :func:`stream_download`.
     :return: The result of unpacking the url.
     :rtype: None
     """
     unpack_fn = resolve_possible_shim(unpack_fn)
     downloader_provider = resolve_possible_shim(downloader_provider)
     tempdir_manager_provider = resolve_possible_shim(tempdir_manager_provider)
-    required_args = inspect.getargs(unpack_fn.__code__).args  # type: ignore
+    unpack_adapter = get_call_adapter(unpack_fn, renames={"downloader": "download"})
     unpack_kwargs = {"download_dir": download_dir}
     with tempdir_manager_provider():
         if ireq:
@@ -752,25 +1959,212 @@ def shim_unpack(
                 hashes = ireq.hashes(True)
             if location is None and getattr(ireq, "source_dir", None):
                 location = ireq.source_dir
+        if (
+            stream_hashes
+            and download_dir
+            and _is_streamable(link)
+            and not os.path.exists(os.path.join(download_dir, link.filename))
+        ):
+            assert session is not None
+            if stream_downloader is None:
+                stream_downloader = stream_download
+            stream_downloader(
+                link,
+                download_dir,
+                session,
+                hashes=hashes,
+                favorite_hash_provider=favorite_hash_provider,
+            )
+            # pip picks the verified file up from the download directory, and would
+            # read it again to check the hashes if they were passed along
+            hashes = None
         unpack_kwargs.update({"link": link, "location": location})
-        if hashes is not None and "hashes" in required_args:
+        if hashes is not None and unpack_adapter.accepts("hashes"):
             unpack_kwargs["hashes"] = hashes
-        if "progress_bar" in required_args:
+        if unpack_adapter.accepts("progress_bar"):
             unpack_kwargs["progress_bar"] = progress_bar
-        if only_download is not None and "only_download" in required_args:
+        if only_download is not None and unpack_adapter.accepts("only_download"):
             unpack_kwargs["only_download"] = only_download
-        if session is not None and "session" in required_args:
+        if session is not None and unpack_adapter.accepts("session"):
             unpack_kwargs["session"] = session
-        if (
-            "download" in required_args or "downloader" in required_args
-        ) and downloader_provider is not None:
-            arg_name = "download" if "download" in required_args else "downloader"
+        if unpack_adapter.accepts("downloader") and downloader_provider is not None:
+            # older pip versions call this argument ``download``
             assert session is not None
             assert progress_bar is not None
-            unpack_kwargs[arg_name] = downloader_provider(session, progress_bar)
-        if "verbosity" in required_args:
+            unpack_kwargs["downloader"] = downloader_provider(session, progress_bar)
+        if unpack_adapter.accepts("verbosity"):
             unpack_kwargs["verbosity"] = verbosity
-        return unpack_fn(**unpack_kwargs)  # type: ignore
+        return unpack_adapter(unpack_fn, **unpack_kwargs)  # type: ignore
+
+
+class _TimedDownloader(object):
+    """
+    Wraps a shared downloader to bound concurrent downloads and time each one.
+
+    Streamed downloads go through :meth:`stream` to share the same bound and timer.
+    """
+
+    def __init__(self, downloader, semaphore):
+        # type: (Optional[Any], threading.Semaphore) -> None
+        self._downloader = downloader
+        self._semaphore = semaphore
+        self.download_time = None  # type: Optional[float]
+        if downloader is not None:
+            self.download_time = 0.0
+
+    def __getattr__(self, name):
+        # type: (str) -> Any
+        return getattr(self._downloader, name)
+
+    def _timed(self, func, *args, **kwargs):
+        # type: (Callable, Any, Any) -> Any
+        with self._semaphore:
+            start = time.monotonic()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.monotonic() - start
+                self.download_time = (self.download_time or 0.0) + elapsed
+
+    def __call__(self, *args, **kwargs):
+        # type: (Any, Any) -> Any
+        return self._timed(self._downloader, *args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        # type: (Any, Any) -> StreamedDownload
+        return self._timed(stream_download, *args, **kwargs)
+
+
+UnpackResult = collections.namedtuple(
+    "UnpackResult",
+    ["item", "link", "location", "result", "error", "download_time", "unpack_time"],
+)
+
+
+def unpack_many(
+    unpack_fn,  # type: TShimmedFunc
+    download_dir,  # type: str
+    tempdir_manager_provider,  # type: TShimmedFunc
+    items,  # type: Iterable[Any]
+    src_dir=None,  # type: Optional[str]
+    max_downloads=4,  # type: int
+    max_workers=None,  # type: Optional[int]
+    progress_bar="off",  # type: str
+    downloader_provider=None,  # type: Optional[TShimmedFunc]
+    session=None,  # type: Optional[Any]
+    install_cmd_provider=None,  # type: Optional[TShimmedFunc]
+    verbosity=0,  # type: Optional[int]
+    stream_hashes=False,  # type: bool
+    favorite_hash_provider=None,  # type: Optional[TShimmedFunc]
+):
+    # type: (...) -> List[UnpackResult]
+    """
+    Download and unpack many links or requirements concurrently.
+
+    Each item is unpacked as :func:`shim_unpack` would unpack it, on a pool of threads
+    which share one session and one downloader, inside a single tempdir manager
+    context. At most **max_downloads** downloads run at once, while the remaining
+    threads extract archives that have already been downloaded.
+
+    :param unpack_fn: A callable or shim referring to the pip implementation
+    :type unpack_fn: Callable
+    :param str download_dir: The directory to download the files to
+    :param TShimmedFunc tempdir_manager_provider: A callable or shim referring to
+        `global_tempdir_manager` function from pip or a shimmed no-op context manager
+    :param items: The :class:`~pip._internal.models.link.Link` or
+        :class:`~pip._internal.req.req_install.InstallRequirement` instances to unpack
+    :param Optional[str] src_dir: The directory to unpack links into, and to create
+        source directories for requirements without one in, defaults to
+        **download_dir**
+    :param int max_downloads: The number of downloads to run at once, defaults to 4
+    :param Optional[int] max_workers: The number of threads, defaults to twice
+        **max_downloads**
+    :param str progress_bar: Indicates progress par usage during download, defaults to
+        off.
+    :param Optional[ShimmedPathCollection] downloader_provider: A downloader class
+        to instantiate, if applicable.
+    :param Optional[`~requests.Session`] session: A PipSession instance, defaults to
+        a pooled session from :func:`get_session`
+    :param Optional[TShimmedFunc] install_cmd_provider: A shim for providing new
+        install command instances, used to build the session if none is passed in.
+    :param Optional[int] verbosity: 1 or 0 to indicate verbosity flag, defaults to 0.
+    :param bool stream_hashes: Whether to verify hashes while downloading, as with
+        :func:`shim_unpack`, defaults to False.
+    :param Optional[TShimmedFunc] favorite_hash_provider: A shim for pip's
+        ``FAVORITE_HASH``, used when streaming hashes.
+    :return: An :class:`UnpackResult` for each item, in order, holding the result of
+        unpacking it or the error raised while doing so, along with the seconds spent
+        downloading and unpacking it. The download time is ``None`` for pip versions
+        which download without a downloader, unless the item's download was streamed.
+    :rtype: List[UnpackResult]
+    """
+    items = list(items)
+    if src_dir is None:
+        src_dir = download_dir
+    unpack_fn = resolve_possible_shim(unpack_fn)
+    downloader_provider = resolve_possible_shim(downloader_provider)
+    tempdir_manager_provider = resolve_possible_shim(tempdir_manager_provider)
+    if session is None:
+        session = get_session(install_cmd_provider=install_cmd_provider)
+    downloader = None
+    if downloader_provider is not None:
+        downloader = downloader_provider(session, progress_bar)
+    semaphore = threading.Semaphore(max_downloads)
+
+    def unpack(item):
+        # type: (Any) -> UnpackResult
+        start = time.monotonic()
+        timed = _TimedDownloader(downloader, semaphore)
+        ireq, link, location = None, item, None  # type: Any, Any, Optional[str]
+        result, error = None, None
+        try:
+            if callable(getattr(item, "hashes", None)):
+                ireq, link = item, item.link
+                if getattr(ireq, "source_dir", None) is None:
+                    ireq.ensure_has_source_dir(src_dir)
+                location = ireq.source_dir
+            else:
+                location = os.path.join(src_dir, link.splitext()[0])
+            result = shim_unpack(
+                unpack_fn=unpack_fn,
+                download_dir=download_dir,
+                tempdir_manager_provider=nullcontext,
+                ireq=ireq,
+                link=link,
+                location=location,
+                progress_bar=progress_bar,
+                downloader_provider=(
+                    (lambda *args: timed) if downloader is not None else None
+                ),
+                session=session,
+                verbosity=verbosity,
+                stream_hashes=stream_hashes,
+                favorite_hash_provider=favorite_hash_provider,
+                stream_downloader=timed.stream,
+            )
+        except Exception as exc:
+            error = exc
+        elapsed = time.monotonic() - start
+        download_time = timed.download_time
+        return UnpackResult(
+            item,
+            link,
+            location,
+            result,
+            error,
+            download_time,
+            elapsed - (download_time or 0.0),
+        )
+
+    if max_workers is None:
+        max_workers = 2 * max_downloads
+    # Temporary directories created by worker threads register with the global
+    # tempdir manager, so it only needs to be entered once for the whole batch
+    with tempdir_manager_provider():
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pip-shims-unpack"
+        ) as executor:
+            return list(executor.map(unpack, items))
 
 
 def _ensure_finder(
@@ -908,9 +2302,7 @@ def make_preparer(
     }
     if install_cmd is None:
         assert install_cmd_provider is not None
-        install_cmd_provider = resolve_possible_shim(install_cmd_provider)
-        assert isinstance(install_cmd_provider, (type, functools.partial))
-        install_cmd = install_cmd_provider()
+        install_cmd = get_install_command(install_cmd_provider)
     preparer_args, options = populate_options(install_cmd, options, **options_map)
     if options is not None and pip_options_created:
         for k, v in options_map.items():
@@ -1109,16 +2501,15 @@ def get_resolver(
     format_control_provider = resolve_possible_shim(format_control_provider)
     wheel_cache_provider = resolve_possible_shim(wheel_cache_provider)
     install_cmd_provider = resolve_possible_shim(install_cmd_provider)
-    required_args = inspect.getargs(resolver_fn.__init__.__code__).args  # type: ignore
+    resolver_adapter = get_call_adapter(resolver_fn.__init__)  # type: ignore
     install_cmd_dependency_map = {"session": session, "finder": finder}
     resolver_kwargs = {}  # type: Dict[str, Any]
     if install_cmd is None:
-        assert isinstance(install_cmd_provider, (type, functools.partial))
-        install_cmd = install_cmd_provider()
+        install_cmd = get_install_command(install_cmd_provider)
     if options is None and install_cmd is not None:
-        options, _ = install_cmd.parser.parse_args([])  # type: ignore
+        options = get_default_options(install_cmd)
     for arg, val in install_cmd_dependency_map.items():
-        if arg not in required_args:
+        if not resolver_adapter.accepts(arg):
             continue
         elif val is None and install_cmd is None:
             raise TypeError(
@@ -1130,7 +2521,7 @@ def get_resolver(
         elif arg == "finder" and val is None:
             val = get_package_finder(install_cmd, options=options, session=session)
         resolver_kwargs[arg] = val
-    if "make_install_req" in required_args:
+    if resolver_adapter.accepts("make_install_req"):
         if make_install_req is None and install_req_provider is not None:
             make_install_req_kwargs = {
                 "isolated": isolated,
@@ -1145,7 +2536,7 @@ def get_resolver(
             )
         assert make_install_req is not None
         resolver_kwargs["make_install_req"] = make_install_req
-    if "isolated" in required_args:
+    if resolver_adapter.accepts("isolated"):
         resolver_kwargs["isolated"] = isolated
     resolver_kwargs.update(
         {
@@ -1158,7 +2549,7 @@ def get_resolver(
             "preparer": preparer,
         }
     )
-    if "wheel_cache" in required_args:
+    if resolver_adapter.accepts("wheel_cache"):
         with _ensure_wheel_cache(
             wheel_cache=wheel_cache,
             wheel_cache_provider=wheel_cache_provider,
@@ -1166,8 +2557,8 @@ def get_resolver(
             options=options,
         ) as wheel_cache:
             resolver_kwargs["wheel_cache"] = wheel_cache
-            return resolver_fn(**resolver_kwargs)  # type: ignore
-    return resolver_fn(**resolver_kwargs)  # type: ignore
+            return resolver_adapter(resolver_fn, **resolver_kwargs)  # type: ignore
+    return resolver_adapter(resolver_fn, **resolver_kwargs)  # type: ignore
 
 
 def resolve(  # noqa:C901
@@ -1201,6 +2592,7 @@ def resolve(  # noqa:C901
     wheel_cache=None,  # type: Optional[TWheelCache]
     require_hashes=None,  # type: bool
     check_supported_wheels=True,  # type: bool
+    scratch_pool=None,  # type: Optional[ScratchDirectoryPool]
 ):
     # (...) -> Set[TInstallRequirement]
     """
@@ -1264,6 +2656,8 @@ def resolve(  # noqa:C901
         False.
     :param bool check_supported_wheels: Whether to check support of wheels before including
         them in resolution.
+    :param Optional[ScratchDirectoryPool] scratch_pool: The pool to lease any missing
+        directories from, defaults to the shared pool from :func:`get_scratch_pool`
     :return: A dictionary mapping requirements to corresponding
         :class:`~pip._internal.req.req_install.InstallRequirement`s
     :rtype: :class:`~pip._internal.req.req_install.InstallRequirement`
@@ -1296,6 +2690,134 @@ def resolve(  # noqa:C901
     rtifi-2019.9.11-py2.py3-none-any.whl#sha256=fd7c7c74727ddcf00e9acd26bba8da604ffec95bf
     1c2144e67aff7a8b50e6cef (from requests>=2.20) editable=False>
     """
+    with _resolution_context(
+        reqset_provider=reqset_provider,
+        req_tracker_provider=req_tracker_provider,
+        install_cmd_provider=install_cmd_provider,
+        install_command=install_command,
+        finder_provider=finder_provider,
+        resolver_provider=resolver_provider,
+        wheel_cache_provider=wheel_cache_provider,
+        format_control_provider=format_control_provider,
+        make_preparer_provider=make_preparer_provider,
+        tempdir_manager_provider=tempdir_manager_provider,
+        options=options,
+        session=session,
+        finder=finder,
+        upgrade_strategy=upgrade_strategy,
+        force_reinstall=force_reinstall,
+        ignore_dependencies=ignore_dependencies,
+        ignore_requires_python=ignore_requires_python,
+        ignore_installed=ignore_installed,
+        use_user_site=use_user_site,
+        isolated=isolated,
+        build_dir=build_dir,
+        source_dir=source_dir,
+        download_dir=download_dir,
+        cache_dir=cache_dir,
+        wheel_download_dir=wheel_download_dir,
+        require_hashes=require_hashes,
+        check_supported_wheels=check_supported_wheels,
+        scratch_pool=scratch_pool,
+    ) as resolve_requirements:
+        return resolve_requirements([ireq])
+
+
+ResolveResult = collections.namedtuple("ResolveResult", ["ireq", "result", "error"])
+
+
+def resolve_many(
+    ireqs,  # type: Iterable[TInstallRequirement]
+    combined=False,  # type: bool
+    **kwargs,  # type: Any
+):
+    # type: (...) -> List[ResolveResult]
+    """
+    Resolves many **InstallRequirements** using a single pip context.
+
+    The install command, options, session, finder, wheel cache, temporary directories
+    and preparer are set up once and shared by every requirement, rather than rebuilt
+    for each one as repeated calls to :func:`resolve` would.
+
+    :param Iterable[:class:`~pip._internal.req.req_install.InstallRequirement`] ireqs:
+        The InstallRequirements to resolve
+    :param bool combined: Whether to resolve all requirements together as a single
+        requirement set, defaults to False which resolves each requirement in its own
+        requirement set
+    :param kwargs: Any keyword argument accepted by :func:`resolve`
+    :return: A :class:`ResolveResult` for each requirement, in order, holding either the
+        mapping of names to resolved requirements or the error raised while resolving.
+        In combined mode every requirement shares the result or error of the combined
+        requirement set.
+    :rtype: List[ResolveResult]
+
+    :Example:
+
+    >>> from pip_shims.shims import resolve_many, InstallRequirement
+    >>> ireqs = [InstallRequirement.from_line(line) for line in ("requests", "six")]
+    >>> for ireq, result, error in resolve_many(ireqs):
+    ...     print(ireq.name, sorted(result) if error is None else error)
+    requests ['certifi', 'chardet', 'idna', 'requests', 'urllib3']
+    six ['six']
+    """
+    ireqs = list(ireqs)
+    kwargs.pop("resolver", None)
+    results = []  # type: List[ResolveResult]
+    with _resolution_context(**kwargs) as resolve_requirements:
+        if combined:
+            result, error = None, None
+            try:
+                result = resolve_requirements(ireqs)
+            except Exception as exc:
+                error = exc
+            return [ResolveResult(ireq, result, error) for ireq in ireqs]
+        for ireq in ireqs:
+            try:
+                results.append(ResolveResult(ireq, resolve_requirements([ireq]), None))
+            except Exception as exc:
+                results.append(ResolveResult(ireq, None, exc))
+    return results
+
+
+@contextlib.contextmanager
+def _resolution_context(  # noqa:C901
+    reqset_provider=None,  # type: Optional[TShimmedFunc]
+    req_tracker_provider=None,  # type: Optional[TShimmedFunc]
+    install_cmd_provider=None,  # type: Optional[TShimmedFunc]
+    install_command=None,  # type: Optional[TCommand]
+    finder_provider=None,  # type: Optional[TShimmedFunc]
+    resolver_provider=None,  # type: Optional[TShimmedFunc]
+    wheel_cache_provider=None,  # type: Optional[TShimmedFunc]
+    format_control_provider=None,  # type: Optional[TShimmedFunc]
+    make_preparer_provider=None,  # type: Optional[TShimmedFunc]
+    tempdir_manager_provider=None,  # type: Optional[TShimmedFunc]
+    options=None,  # type: Optional[Values]
+    session=None,  # type: Optional[TSession]
+    finder=None,  # type: Optional[TFinder]
+    upgrade_strategy="to-satisfy-only",  # type: str
+    force_reinstall=None,  # type: Optional[bool]
+    ignore_dependencies=None,  # type: Optional[bool]
+    ignore_requires_python=None,  # type: Optional[bool]
+    ignore_installed=True,  # type: bool
+    use_user_site=False,  # type: bool
+    isolated=None,  # type: Optional[bool]
+    build_dir=None,  # type: Optional[str]
+    source_dir=None,  # type: Optional[str]
+    download_dir=None,  # type: Optional[str]
+    cache_dir=None,  # type: Optional[str]
+    wheel_download_dir=None,  # type: Optional[str]
+    require_hashes=None,  # type: bool
+    check_supported_wheels=True,  # type: bool
+    scratch_pool=None,  # type: Optional[ScratchDirectoryPool]
+):
+    # type: (...) -> Iterator[Callable[[List[TInstallRequirement]], Dict[str, Any]]]
+    """
+    Sets up the shared state needed to resolve requirements.
+
+    Yields a function which resolves a list of InstallRequirements as one requirement
+    set and returns the mapping of names to resolved requirements. See :func:`resolve`
+    for a description of the arguments.
+    """
     reqset_provider = resolve_possible_shim(reqset_provider)
     finder_provider = resolve_possible_shim(finder_provider)
     resolver_provider = resolve_possible_shim(resolver_provider)
@@ -1306,8 +2828,7 @@ def resolve(  # noqa:C901
     install_cmd_provider = resolve_possible_shim(install_cmd_provider)
     tempdir_manager_provider = resolve_possible_shim(tempdir_manager_provider)
     if install_command is None:
-        assert isinstance(install_cmd_provider, (type, functools.partial))
-        install_command = install_cmd_provider()
+        install_command = get_install_command(install_cmd_provider)
     kwarg_map = {
         "upgrade_strategy": upgrade_strategy,
         "force_reinstall": force_reinstall,
@@ -1326,7 +2847,9 @@ def resolve(  # noqa:C901
     with contextlib.ExitStack() as ctx:
         ctx.enter_context(tempdir_manager_provider())
         kwargs = ctx.enter_context(
-            ensure_resolution_dirs(wheel_download_dir=wheel_download_dir, **kwargs)
+            ensure_resolution_dirs(
+                scratch_pool=scratch_pool, wheel_download_dir=wheel_download_dir, **kwargs
+            )
         )
         wheel_download_dir = kwargs.pop("wheel_download_dir")
         if session is None:
@@ -1341,25 +2864,15 @@ def resolve(  # noqa:C901
         wheel_cache = ctx.enter_context(
             wheel_cache_provider(kwargs["cache_dir"], format_control)
         )  # type: ignore
-        ireq.is_direct = True  # type: ignore
         build_location_kwargs = {
             "build_dir": kwargs["build_dir"],
             "autodelete": True,
             "parallel_builds": False,
         }
-        call_function_with_correct_args(ireq.build_location, **build_location_kwargs)
         if reqset_provider is None:
             raise TypeError(
                 "cannot resolve without a requirement set provider... failed!"
             )
-        reqset = reqset_provider(
-            install_command,
-            options=options,
-            session=session,
-            wheel_download_dir=wheel_download_dir,
-            **kwargs,
-        )  # type: ignore
-
         preparer_args = {
             "build_dir": kwargs["build_dir"],
             "src_dir": kwargs["src_dir"],
@@ -1384,51 +2897,459 @@ def resolve(  # noqa:C901
             "isolated",
             "use_user_site",
         ]
-        resolver_args = {key: kwargs[key] for key in resolver_keys if key in kwargs}
+        resolver_kwargs = {key: kwargs[key] for key in resolver_keys if key in kwargs}
         if resolver_provider is None:
             raise TypeError("Cannot resolve without a resolver provider... failed!")
         preparer = ctx.enter_context(make_preparer_provider(**preparer_args))
-        resolver = resolver_provider(
-            finder=finder,
-            preparer=preparer,
-            session=session,
-            options=options,
-            install_cmd=install_command,
-            wheel_cache=wheel_cache,
-            **resolver_args,
-        )  # type: ignore
-        resolver.require_hashes = kwargs.get("require_hashes", False)  # type: ignore
-        _, required_resolver_args = get_method_args(resolver.resolve)
-        resolver_args = []
-        if "requirement_set" in required_resolver_args.args:
-            if hasattr(reqset, "add_requirement"):
-                reqset.add_requirement(ireq)
-            else:  # Pip >= 22.1.0
-                resolver._add_requirement_to_set(reqset, ireq)
-            resolver_args.append(reqset)
-        elif "root_reqs" in required_resolver_args.args:
-            resolver_args.append([ireq])
-        if "check_supported_wheels" in required_resolver_args.args:
-            resolver_args.append(check_supported_wheels)
-        if getattr(reqset, "prepare_files", None):
-            if hasattr(reqset, "add_requirement"):
-                reqset.add_requirement(ireq)
-            else:  # Pip >= 22.1.0
-                resolver._add_requirement_to_set(reqset, ireq)
-            results = reqset.prepare_files(finder)
-            result = reqset.requirements
-            reqset.cleanup_files()
-            return result
-        if make_preparer_provider is None:
-            raise TypeError("Cannot create requirement preparer, cannot resolve!")
-        result_reqset = resolver.resolve(*resolver_args)  # type: ignore
-        if result_reqset is None:
-            result_reqset = reqset
-        results = result_reqset.requirements
-        cleanup_fn = getattr(reqset, "cleanup_files", None)
-        if cleanup_fn is not None:
-            cleanup_fn()
-        return results
+
+        def resolve_requirements(ireqs):
+            # type: (List[TInstallRequirement]) -> Dict[str, Any]
+            for ireq in ireqs:
+                ireq.is_direct = True  # type: ignore
+                call_function_with_correct_args(
+                    ireq.build_location, **build_location_kwargs
+                )
+            reqset = reqset_provider(
+                install_command,
+                options=options,
+                session=session,
+                wheel_download_dir=wheel_download_dir,
+                **kwargs,
+            )  # type: ignore
+            # Resolvers keep per-resolution state, so each requirement set gets its own
+            resolver = resolver_provider(
+                finder=finder,
+                preparer=preparer,
+                session=session,
+                options=options,
+                install_cmd=install_command,
+                wheel_cache=wheel_cache,
+                **resolver_kwargs,
+            )  # type: ignore
+            resolver.require_hashes = kwargs.get("require_hashes", False)  # type: ignore
+            _, required_resolver_args = get_method_args(resolver.resolve)
+            resolver_args = []
+            if "requirement_set" in required_resolver_args.args:
+                for ireq in ireqs:
+                    if hasattr(reqset, "add_requirement"):
+                        reqset.add_requirement(ireq)
+                    else:  # Pip >= 22.1.0
+                        resolver._add_requirement_to_set(reqset, ireq)
+                resolver_args.append(reqset)
+            elif "root_reqs" in required_resolver_args.args:
+                resolver_args.append(list(ireqs))
+            if "check_supported_wheels" in required_resolver_args.args:
+                resolver_args.append(check_supported_wheels)
+            if getattr(reqset, "prepare_files", None):
+                for ireq in ireqs:
+                    if hasattr(reqset, "add_requirement"):
+                        reqset.add_requirement(ireq)
+                    else:  # Pip >= 22.1.0
+                        resolver._add_requirement_to_set(reqset, ireq)
+                reqset.prepare_files(finder)
+                result = reqset.requirements
+                reqset.cleanup_files()
+                return result
+            if make_preparer_provider is None:
+                raise TypeError("Cannot create requirement preparer, cannot resolve!")
+            result_reqset = resolver.resolve(*resolver_args)  # type: ignore
+            if result_reqset is None:
+                result_reqset = reqset
+            results = result_reqset.requirements
+            cleanup_fn = getattr(reqset, "cleanup_files", None)
+            if cleanup_fn is not None:
+                cleanup_fn()
+            return results
+
+        yield resolve_requirements
+
+
+class WheelBuildCache(object):
+    """
+    A content-addressed cache of built wheels, shareable between hosts.
+
+    Wheels are keyed by the sha256 digest of the source archive they were built
+    from, the interpreter tag, the build and global options and the versions of the
+    build requirements installed for the build, so the same source is only built once
+    no matter which url it was fetched from. Wheels are published with an atomic
+    rename, and the least recently used wheels are removed once the cache grows
+    beyond **max_size** bytes. The size of the cache is measured once and then kept
+    up to date as wheels are published, so wheels published by other processes are
+    only counted the next time the cache is pruned.
+
+    :param str cache_dir: The directory to store wheels in
+    :param Optional[int] max_size: The maximum total size of the cached wheels in
+        bytes, defaults to no limit
+    :param Optional[str] interpreter_tag: The tag of the interpreter wheels are built
+        for, defaults to the most specific tag supported by the running interpreter
+    """
+
+    def __init__(self, cache_dir, max_size=None, interpreter_tag=None):
+        # type: (str, Optional[int], Optional[str]) -> None
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        if interpreter_tag is None:
+            from packaging.tags import sys_tags
+
+            interpreter_tag = str(next(iter(sys_tags())))
+        self.interpreter_tag = interpreter_tag
+        self._size = None  # type: Optional[int]
+
+    @staticmethod
+    def hash_file(path):
+        # type: (str) -> str
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_source_path(req):
+        # type: (TInstallRequirement) -> Optional[str]
+        """
+        Get the local source archive **req** is built from.
+
+        :return: The path to the archive, or ``None`` for directories, vcs checkouts
+            and requirements which haven't been downloaded
+        :rtype: Optional[str]
+        """
+        path = getattr(req, "local_file_path", None)
+        link = getattr(req, "link", None)
+        if path is None and link is not None and getattr(link, "is_file", False):
+            path = link.file_path
+        if path is None or not os.path.isfile(path):
+            return None
+        return path
+
+    @staticmethod
+    def get_build_requires(req):
+        # type: (TInstallRequirement) -> List[str]
+        """
+        Get the build requirements **req** is built with, pinned to installed versions.
+
+        Isolated builds use every distribution installed in the requirement's build
+        environment. Other builds use the running environment's versions of the
+        declared build requirements, or of setuptools and wheel for legacy projects.
+
+        :return: A sorted list of ``name==version`` pins
+        :rtype: List[str]
+        """
+        build_env = getattr(req, "build_env", None)
+        lib_dirs = getattr(build_env, "_lib_dirs", None)
+        if lib_dirs is None:
+            prefixes = getattr(build_env, "_prefixes", None) or {}
+            lib_dirs = [
+                lib_dir
+                for prefix in prefixes.values()
+                for lib_dir in getattr(prefix, "lib_dirs", ())
+            ]
+        lib_dirs = [lib_dir for lib_dir in lib_dirs if os.path.isdir(lib_dir)]
+        if lib_dirs:
+            installed = _get_installed_versions(lib_dirs)
+        else:
+            names = set()
+            declared = getattr(req, "pyproject_requires", None) or ["setuptools", "wheel"]
+            for line in declared:
+                try:
+                    names.add(canonicalize_name(Requirement(line).name))
+                except InvalidRequirement:
+                    continue
+            installed = {
+                name: version
+                for name, version in _get_installed_versions().items()
+                if name in names
+            }
+            installed.update((name, None) for name in names - set(installed))
+        return sorted(
+            "{0}=={1}".format(name, version) if version else name
+            for name, version in installed.items()
+        )
+
+    def get_key(
+        self,
+        source_digest,  # type: str
+        build_options=None,  # type: Optional[Iterable[str]]
+        global_options=None,  # type: Optional[Iterable[str]]
+        build_requires=None,  # type: Optional[Iterable[str]]
+    ):
+        # type: (...) -> str
+        """
+        Build the key a wheel is cached under.
+
+        :param str source_digest: The sha256 digest of the source archive
+        :param build_options: The build options used to build the wheel
+        :param global_options: The global options used to build the wheel
+        :param build_requires: The build requirements, pinned to the installed versions
+        :return: A hex digest
+        :rtype: str
+        """
+        key = [
+            source_digest,
+            self.interpreter_tag,
+            list(build_options or ()),
+            list(global_options or ()),
+            sorted(build_requires or ()),
+        ]
+        return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+    def get_key_for_req(self, req, build_options=None, global_options=None):
+        # type: (TInstallRequirement, Optional[List[str]], Optional[List[str]]) -> Optional[str]  # noqa
+        """
+        Build the key the wheel for **req** is cached under.
+
+        :return: A hex digest, or ``None`` if **req** isn't built from a local archive
+        :rtype: Optional[str]
+        """
+        source_path = self.get_source_path(req)
+        if source_path is None:
+            return None
+        return self.get_key(
+            self.hash_file(source_path),
+            build_options=build_options,
+            global_options=global_options,
+            build_requires=self.get_build_requires(req),
+        )
+
+    def _get_entry_dir(self, key):
+        # type: (str) -> str
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        # type: (str) -> Optional[str]
+        """
+        Get the cached wheel for **key**, marking it as recently used.
+
+        :param str key: The key from :meth:`get_key`
+        :return: The path to the cached wheel, if there is one
+        :rtype: Optional[str]
+        """
+        entry_dir = self._get_entry_dir(key)
+        try:
+            names = [name for name in os.listdir(entry_dir) if name.endswith(".whl")]
+        except OSError:
+            return None
+        if not names:
+            return None
+        path = os.path.join(entry_dir, names[0])
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def publish(self, key, wheel_path):
+        # type: (str, str) -> str
+        """
+        Add the wheel at **wheel_path** to the cache under **key**.
+
+        :param str key: The key from :meth:`get_key`
+        :param str wheel_path: The path to the built wheel
+        :return: The path to the cached wheel
+        :rtype: str
+        """
+        entry_dir = self._get_entry_dir(key)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(entry_dir))
+        try:
+            # a plain copy, so the wheel's mtime records when it was last used
+            shutil.copy(wheel_path, staging_dir)
+            try:
+                os.rename(staging_dir, entry_dir)
+            except OSError:
+                # another build of the same source was published first
+                pass
+            else:
+                if self._size is not None:
+                    self._size += os.path.getsize(wheel_path)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self.prune()
+        cached = self.get(key)
+        return cached if cached is not None else wheel_path
+
+    def prune(self):
+        # type: () -> None
+        """
+        Remove the least recently used wheels until the cache fits **max_size**.
+
+        The cache directory is only walked when its size isn't known yet, or when the
+        size tracked since the last walk exceeds **max_size**.
+        """
+        if self.max_size is None:
+            return
+        if self._size is not None and self._size <= self.max_size:
+            return
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            if os.path.basename(root).startswith(".tmp-"):
+                continue
+            for name in files:
+                if not name.endswith(".whl"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, root))
+                total += stat.st_size
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+        self._size = total
+
+
+def _get_installed_versions(paths=None):
+    # type: (Optional[List[str]]) -> Dict[str, str]
+    """
+    Get the versions of the distributions installed in **paths**, or on
+    :data:`sys.path` if none are given, keyed by canonical name.
+    """
+    try:
+        from importlib import metadata
+    except ImportError:  # pragma: no cover
+        import pkg_resources
+
+        working_set = pkg_resources.WorkingSet(paths)
+        found = ((dist.project_name, dist.version) for dist in working_set)
+    else:
+        kwargs = {"path": paths} if paths is not None else {}
+        found = (
+            (dist.metadata["Name"], dist.version)
+            for dist in metadata.distributions(**kwargs)
+        )
+    versions = {}  # type: Dict[str, str]
+    for name, version in found:
+        if name:
+            versions.setdefault(canonicalize_name(name), version)
+    return versions
+
+
+def _use_cached_wheel(req, wheel_path, path_to_url_provider=None):
+    # type: (TInstallRequirement, str, Optional[TShimmedFunc]) -> None
+    path_to_url_provider = resolve_possible_shim(path_to_url_provider)
+    if path_to_url_provider is not None:
+        url = path_to_url_provider(wheel_path)
+    else:
+        url = pathlib.Path(os.path.abspath(wheel_path)).as_uri()
+    req.link = type(req.link)(url)
+    req.local_file_path = wheel_path
+
+
+def _use_worker_temp_dir(temp_dir=None):
+    # type: (Optional[str]) -> str
+    """
+    Give the current worker process a temporary directory of its own.
+
+    :param Optional[str] temp_dir: The directory to create it in
+    :return: The path to the new directory
+    :rtype: str
+    """
+    worker_dir = tempfile.mkdtemp(prefix="pip-shims-worker-", dir=temp_dir)
+    tempfile.tempdir = worker_dir
+    os.environ["TMPDIR"] = worker_dir
+    return worker_dir
+
+
+# Set in each forked worker by its initializer, so workers inherit the prepared
+# requirements of their own call rather than receiving them pickled
+_worker_build_state = {}  # type: Dict[str, Any]
+
+# Parallel builds are serialised, so no call forks while another call's workers
+# are being started or are running
+_parallel_build_lock = threading.Lock()
+
+
+def _initialize_build_worker(temp_dir, build_many, reqs, build_args):
+    # type: (str, Callable, List[TInstallRequirement], List[Any]) -> None
+    _use_worker_temp_dir(temp_dir)
+    _worker_build_state.update(build_many=build_many, reqs=reqs, build_args=build_args)
+
+
+def _build_one_in_worker(index):
+    # type: (int) -> Tuple[int, Any, Optional[str]]
+    build_many = _worker_build_state["build_many"]
+    req = _worker_build_state["reqs"][index]
+    successes, _ = build_many([req], *_worker_build_state["build_args"])
+    if not successes:
+        return index, None, None
+    return index, req.link, getattr(req, "local_file_path", None)
+
+
+def _can_fork_workers():
+    # type: () -> bool
+    # Forking a process with other running threads can leave locks they held,
+    # such as the logging or import locks, held forever in the child
+    return (
+        "fork" in multiprocessing.get_all_start_methods()
+        and threading.active_count() == 1
+    )
+
+
+def build_many_in_parallel(
+    build_many,  # type: Callable
+    reqs,  # type: Iterable[TInstallRequirement]
+    build_args,  # type: Iterable[Any]
+    max_workers=None,  # type: Optional[int]
+    temp_dir=None,  # type: Optional[str]
+):
+    # type: (...) -> Tuple[List[TInstallRequirement], List[TInstallRequirement]]
+    """
+    Build prepared requirements concurrently on a pool of forked worker processes.
+
+    Each requirement is built by calling **build_many** with it alone in a worker,
+    which inherits the prepared requirement and its build environment from this
+    process. Every worker uses its own temporary directory beneath **temp_dir**; when
+    that is on the same filesystem as the wheel cache, pip moves finished wheels into
+    the cache with an atomic rename. Falls back to building sequentially where
+    processes can't be forked, or when other threads are running, as they are when
+    called from :mod:`pip_shims.aio`, since forking them isn't safe.
+
+    :param Callable build_many: pip's ``build`` function, or a compatible callable
+        returning a tuple of successes and failures
+    :param reqs: The prepared requirements to build
+    :param build_args: The arguments passed to **build_many** after the requirements
+    :param Optional[int] max_workers: The number of worker processes, defaults to the
+        number of CPUs
+    :param Optional[str] temp_dir: The directory to create worker temporary
+        directories in
+    :return: A tuple of successfully built and failed requirements
+    :rtype: Tuple[List[TInstallRequirement], List[TInstallRequirement]]
+    """
+    reqs = list(reqs)
+    build_args = list(build_args)
+    if len(reqs) > 1:
+        # Let the scratch pool's thread finish deleting old trees and exit first
+        get_scratch_pool().wait()
+    if len(reqs) < 2 or not _can_fork_workers():
+        return build_many(reqs, *build_args)
+    if temp_dir is not None:
+        os.makedirs(temp_dir, exist_ok=True)
+    with _parallel_build_lock, TemporaryDirectory(
+        prefix="pip-shims-build-", dir=temp_dir
+    ) as root:
+        # Forked workers inherit the initializer arguments without pickling them
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_initialize_build_worker,
+            initargs=(root, build_many, reqs, build_args),
+        ) as executor:
+            results = list(executor.map(_build_one_in_worker, range(len(reqs))))
+    successes, failures = [], []
+    for index, link, local_file_path in results:
+        req = reqs[index]
+        if link is None:
+            failures.append(req)
+            continue
+        req.link = link
+        if local_file_path is not None:
+            req.local_file_path = local_file_path
+        successes.append(req)
+    return successes, failures
 
 
 def build_wheel(  # noqa:C901
@@ -1464,6 +3385,11 @@ def build_wheel(  # noqa:C901
     install_command_provider=None,  # type: Optional[TShimmedFunc]
     finder_provider=None,  # type: Optional[TShimmedFunc]
     reqset_provider=None,  # type: Optional[TShimmedFunc]
+    parallel=False,  # type: bool
+    max_workers=None,  # type: Optional[int]
+    build_cache=None,  # type: Optional[WheelBuildCache]
+    path_to_url_provider=None,  # type: Optional[TShimmedFunc]
+    scratch_pool=None,  # type: Optional[ScratchDirectoryPool]
 ):
     # type: (...) -> Generator[Union[str, Tuple[List[TInstallRequirement], ...]], None, None]
     """
@@ -1518,6 +3444,19 @@ def build_wheel(  # noqa:C901
         install command instances
     :param TShimmedFunc finder_provider: A provider to package finder instances
     :param TShimmedFunc reqset_provider: A provider for requirement set generation
+    :param bool parallel: Whether to build the requirements of a **reqset** on a pool
+        of worker processes, see :func:`build_many_in_parallel`. Only used with pip
+        versions providing a ``build`` function, defaults to False
+    :param Optional[int] max_workers: The number of worker processes for parallel
+        builds, defaults to the number of CPUs
+    :param Optional[WheelBuildCache] build_cache: A content-addressed cache to reuse
+        wheels from and publish newly built wheels to, only used with pip versions
+        providing ``build`` and ``_build_one`` functions
+    :param Optional[TShimmedFunc] path_to_url_provider: A provider for the
+        `path_to_url` function, used to link requirements to cached wheels
+    :param Optional[ScratchDirectoryPool] scratch_pool: The pool to lease any missing
+        directories for a new preparer from, defaults to the shared pool from
+        :func:`get_scratch_pool`
     :return: A tuple of successful and failed install requirements or else a path to
         a wheel
     :rtype: Optional[Union[str, Tuple[List[TInstallRequirement], List[TInstallRequirement]]]]
@@ -1549,8 +3488,7 @@ def build_wheel(  # noqa:C901
         kwargs = kwarg_map.copy()
         if wheel_cache is None and (reqset is not None or output_dir is None):
             if install_command is None:
-                assert isinstance(install_cmd_provider, (type, functools.partial))
-                install_command = install_cmd_provider()
+                install_command = get_install_command(install_cmd_provider)
             kwargs, options = populate_options(install_command, options, **kwarg_map)
             format_control = getattr(options, "format_control", None)
             if not format_control:
@@ -1569,11 +3507,65 @@ def build_wheel(  # noqa:C901
                 "build_options": build_options,
                 "global_options": global_options,
             }
-            yield call_function_with_correct_args(build_one_provider, **build_one_kwargs)
-        elif build_many_provider:
-            yield build_many_provider(
-                reqset, wheel_cache, build_options, global_options, check_binary_allowed
+            cache_key = None
+            if build_cache is not None:
+                cache_key = build_cache.get_key_for_req(
+                    req, build_options, global_options
+                )
+                cached = build_cache.get(cache_key) if cache_key else None
+                if cached is not None:
+                    if output_dir:
+                        os.makedirs(output_dir, exist_ok=True)
+                        cached = shutil.copy2(cached, output_dir)
+                    yield cached
+                    return
+            wheel_path = call_function_with_correct_args(
+                build_one_provider, **build_one_kwargs
             )
+            if cache_key is not None and wheel_path:
+                build_cache.publish(cache_key, wheel_path)
+            yield wheel_path
+        elif build_many_provider:
+            build_args = [
+                wheel_cache,
+                build_options,
+                global_options,
+                check_binary_allowed,
+            ]
+            pending = reqset
+            cached_reqs = []  # type: List[TInstallRequirement]
+            cache_keys = {}  # type: Dict[int, str]
+            if build_cache is not None:
+                pending = []
+                for item in reqset:
+                    key = build_cache.get_key_for_req(item, build_options, global_options)
+                    cached = build_cache.get(key) if key else None
+                    if cached is not None:
+                        _use_cached_wheel(item, cached, path_to_url_provider)
+                        cached_reqs.append(item)
+                        continue
+                    if key is not None:
+                        cache_keys[id(item)] = key
+                    pending.append(item)
+            if parallel:
+                successes, failures = build_many_in_parallel(
+                    build_many_provider,
+                    pending,
+                    build_args,
+                    max_workers=max_workers,
+                    temp_dir=getattr(wheel_cache, "cache_dir", None) or cache_dir,
+                )
+            else:
+                successes, failures = build_many_provider(pending, *build_args)
+            if build_cache is None:
+                yield successes, failures
+                return
+            for item in successes:
+                key = cache_keys.get(id(item))
+                wheel_path = getattr(item, "local_file_path", None)
+                if key is not None and wheel_path:
+                    build_cache.publish(key, wheel_path)
+            yield cached_reqs + list(successes), failures
         else:
             builder_args, builder_kwargs = get_allowed_args(wheel_builder_provider)
             if "requirement_set" in builder_args and not reqset:
@@ -1584,6 +3576,9 @@ def build_wheel(  # noqa:C901
                     install_command, options=options, session=session
                 )
             if preparer is None:
+                kwargs = ctx.enter_context(
+                    ensure_resolution_dirs(scratch_pool=scratch_pool, **kwargs)
+                )
                 preparer_kwargs = {
                     "build_dir": kwargs["build_dir"],
                     "src_dir": kwargs["src_dir"],
@@ -5,7 +5,10 @@ Module with functionality to learn about the environment.
 from __future__ import absolute_import
 
 import importlib
+import io
 import os
+import re
+import sys
 
 
 def get_base_import_path():
@@ -16,7 +19,61 @@ def get_base_import_path():
 BASE_IMPORT_PATH = get_base_import_path()
 
 
+_VERSION_RE = re.compile(r"""^__version__\s*=\s*['"]([^'"]+)['"]""", re.MULTILINE)
+_version_cache = {}  # type: Dict[str, Tuple[float, Optional[str]]]
+_init_path_cache = {}  # type: Dict[str, Tuple[Tuple[str, ...], str]]
+
+
+def find_package_init(import_path=BASE_IMPORT_PATH):
+    # type: (str) -> Optional[str]
+    """
+    Find the ``__init__.py`` of a package on :data:`sys.path` without importing it.
+
+    :param str import_path: The dotted import path of the package
+    :return: The path to the package's ``__init__.py``, if it was found
+    :rtype: Optional[str]
+    """
+    search_path = tuple(sys.path)
+    cached_search_path, cached = _init_path_cache.get(import_path, (None, None))
+    if cached_search_path == search_path and os.path.isfile(cached):
+        return cached
+    parts = import_path.split(".")
+    for entry in search_path:
+        candidate = os.path.join(entry or os.curdir, *parts, "__init__.py")
+        if os.path.isfile(candidate):
+            candidate = os.path.abspath(candidate)
+            _init_path_cache[import_path] = (search_path, candidate)
+            return candidate
+    return None
+
+
+def _read_package_version(init_path):
+    # type: (str) -> Optional[str]
+    try:
+        mtime = os.stat(init_path).st_mtime
+    except OSError:
+        return None
+    cached = _version_cache.get(init_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with io.open(init_path, encoding="utf-8") as fh:
+        match = _VERSION_RE.search(fh.read())
+    version = match.group(1) if match else None
+    _version_cache[init_path] = (mtime, version)
+    return version
+
+
 def get_pip_version(import_path=BASE_IMPORT_PATH):
+    # type: (str) -> Optional[str]
+    # Prefer an already imported pip, then read ``__version__`` straight from the
+    # source file (cached by mtime) before paying for a full import
+    version = getattr(sys.modules.get(import_path), "__version__", None)
+    if version is None:
+        init_path = find_package_init(import_path)
+        if init_path is not None:
+            version = _read_package_version(init_path)
+    if version is not None:
+        return version
     try:
         pip = importlib.import_module(import_path)
     except ImportError:
@@ -43,3 +100,6 @@ def is_type_checking():
 
 
 MYPY_RUNNING = os.environ.get("MYPY_RUNNING", is_type_checking())
+
+if MYPY_RUNNING:
+    from typing import Dict, Optional, Tuple
@@ -4,18 +4,30 @@ Helper module for shimming functionality across pip versions.
 """
 from __future__ import absolute_import, print_function
 
+import atexit
+import bisect
 import collections
 import functools
+import hashlib
 import importlib
 import inspect
+import json
 import operator
+import os
 import sys
+import tempfile
+import threading
 import types
 import weakref
 from collections.abc import Mapping, Sequence
 
 from . import compat
-from .environment import BASE_IMPORT_PATH, MYPY_RUNNING, get_pip_version
+from .environment import (
+    BASE_IMPORT_PATH,
+    MYPY_RUNNING,
+    find_package_init,
+    get_pip_version,
+)
 from .utils import (
     add_mixin_to_class,
     apply_alias,
@@ -192,6 +204,13 @@ def lookup_current_pip_version():
     return CURRENT_PIP_VERSION
 
 
+def reset_current_pip_version():
+    # type: () -> None
+    """Forget the cached pip version so the next lookup reads it again."""
+    global CURRENT_PIP_VERSION
+    CURRENT_PIP_VERSION = None
+
+
 class PipVersionRange(Sequence):
     def __init__(self, start, end):
         # type: (PipVersion, PipVersion) -> None
@@ -246,6 +265,9 @@ class PipVersionRange(Sequence):
 
 class ShimmedPath(object):
     __modules = {}  # type: Dict[str, Module]
+    # Failed imports mapped to the sys.path and pip version they failed under
+    __failed_imports = {}  # type: Dict[str, Tuple[Tuple[str, ...], Optional[str]]]
+    __import_stats = {"hits": 0, "misses": 0, "negative_hits": 0}  # type: Dict[str, int]
 
     def __init__(
         self,
@@ -290,6 +312,7 @@ class ShimmedPath(object):
         self.default_args = default_args
         self.aliases = []  # type: List[List[str]]
         self._shimmed = None  # type: Optional[Any]
+        self._lock = threading.RLock()
 
     def _as_tuple(self):
         # type: () -> Tuple[str, PipVersionRange, str, int]
@@ -303,18 +326,50 @@ class ShimmedPath(object):
     @classmethod
     def _import_module(cls, module):
         # type: (str) -> Optional[Module]
+        stats = ShimmedPath.__import_stats
         if module in ShimmedPath.__modules:
             result = ShimmedPath.__modules[module]
             if result is not None:
+                stats["hits"] += 1
                 return result
+        import_state = (tuple(sys.path), get_pip_version())
+        if ShimmedPath.__failed_imports.get(module) == import_state:
+            stats["negative_hits"] += 1
+            return None
+        stats["misses"] += 1
         try:
             imported = importlib.import_module(module)
         except ImportError:
+            ShimmedPath.__failed_imports[module] = import_state
             return None
         else:
+            ShimmedPath.__failed_imports.pop(module, None)
             ShimmedPath.__modules[module] = imported
         return imported
 
+    @classmethod
+    def import_cache_info(cls):
+        # type: () -> Dict[str, int]
+        """
+        Report how module imports made while shimming were served.
+
+        :return: A mapping with counts of ``hits`` (already imported), ``misses``
+            (import attempted) and ``negative_hits`` (skipped because the import
+            already failed with the same :data:`sys.path` and pip version)
+        :rtype: Dict[str, int]
+        """
+        info = dict(ShimmedPath.__import_stats)
+        info["failed"] = len(ShimmedPath.__failed_imports)
+        return info
+
+    @classmethod
+    def clear_import_cache(cls):
+        # type: () -> None
+        """Forget failed imports and reset the counters from :meth:`import_cache_info`."""
+        ShimmedPath.__failed_imports.clear()
+        for key in ShimmedPath.__import_stats:
+            ShimmedPath.__import_stats[key] = 0
+
     @classmethod
     def _parse_provides_dict(
         cls,
@@ -331,7 +386,7 @@ class ShimmedPath(object):
                 creating_classmethods = True
         provides_map = {}
         for item_name, item_value in provides.items():
-            if isinstance(item_value, ShimmedPath):
+            if isinstance(item_value, (ShimmedPath, ShimmedPathCollection)):
                 item_value = item_value.shim()
             if inspect.isfunction(item_value):
                 callable_args = inspect.getargs(item_value.__code__).args
@@ -401,6 +456,11 @@ class ShimmedPath(object):
                     type.__setattr__(type_, method_name, clsmethod)
         return type_
 
+    def _resolve_mixins(self):
+        # type: () -> List[Type]
+        mixins = [resolve_possible_shim(mixin) for mixin in self.provided_mixins]
+        return [mixin for mixin in mixins if inspect.isclass(mixin)]
+
     @property
     def is_class(self):
         # type: () -> bool
@@ -469,8 +529,8 @@ class ShimmedPath(object):
         # type: (Optional[Module]) -> None
         if imported is None:
             return None
-        if self.calculated_module_path in sys.modules:
-            del sys.modules[self.calculated_module_path]
+        # Replace the entry in a single assignment so concurrent imports never see
+        # the module missing from sys.modules
         sys.modules[self.calculated_module_path] = imported
 
     def shim_class(self, imported, attribute_name):
@@ -479,8 +539,9 @@ class ShimmedPath(object):
         if result is not None:
             assert inspect.isclass(result)  # noqa
             result = self._ensure_methods(result)
-            if self.provided_mixins:
-                result = add_mixin_to_class(result, self.provided_mixins)
+            mixins = self._resolve_mixins()
+            if mixins:
+                result = add_mixin_to_class(result, mixins)
             self._imported = imported
             self._provided = result
             self.update_sys_modules(imported)
@@ -498,7 +559,6 @@ class ShimmedPath(object):
             assert isinstance(result, types.ModuleType)
             self._provided = result
             if full_import_path in sys.modules:
-                del sys.modules[full_import_path]
                 sys.modules[full_import_path] = result
             self.update_sys_modules(imported)
             if imported is not None:
@@ -531,18 +591,19 @@ class ShimmedPath(object):
 
     def shim(self):
         # type: () -> (Union[Module, Callable, ContextManager, Type])
-        imported = self._import()
-        if self.is_class:
-            return self.shim_class(imported, self.name_to_import)
-        elif self.is_module:
-            return self.shim_module(imported, self.name_to_import)
-        elif self.is_contextmanager:
-            return self.shim_contextmanager(imported, self.name_to_import)
-        elif self.is_function:
-            return self.shim_function(imported, self.name_to_import)
-        elif self.is_attribute:
-            return self.shim_attribute(imported, self.name_to_import)
-        return self._shim_base(imported, self.name_to_import)
+        with self._lock:
+            imported = self._import()
+            if self.is_class:
+                return self.shim_class(imported, self.name_to_import)
+            elif self.is_module:
+                return self.shim_module(imported, self.name_to_import)
+            elif self.is_contextmanager:
+                return self.shim_contextmanager(imported, self.name_to_import)
+            elif self.is_function:
+                return self.shim_function(imported, self.name_to_import)
+            elif self.is_attribute:
+                return self.shim_attribute(imported, self.name_to_import)
+            return self._shim_base(imported, self.name_to_import)
 
     @property
     def calculated_module_path(self):
@@ -564,6 +625,141 @@ class ShimmedPath(object):
         return hash(self._as_tuple())
 
 
+class ShimManifest(object):
+    """
+    An on-disk record of how each registered shim resolved for one pip install.
+
+    Manifests are keyed by the pip version, the location and modification time of
+    pip's ``__init__.py`` and the modification time of this module, so upgrading
+    either pip or pip-shims automatically points at a new (empty) manifest. Each entry
+    records the module path, attribute name and import type a shim resolved to and
+    whether the import succeeded. Only failed imports are served from the manifest:
+    later processes skip import attempts that are known to fail, while shims that
+    resolved are still imported as usual. The manifest is a single small JSON file and
+    is written atomically at interpreter exit when it has changed.
+    """
+
+    def __init__(self, cache_dir, import_path=BASE_IMPORT_PATH):
+        # type: (str, str) -> None
+        self.cache_dir = cache_dir
+        self.import_path = import_path
+        self.entries = {}  # type: Dict[str, List[Any]]
+        self._key = None  # type: Optional[List[Any]]
+        self._loaded = False
+        self._dirty = False
+
+    def _compute_key(self):
+        # type: () -> Optional[List[Any]]
+        init_path = find_package_init(self.import_path)
+        if init_path is None:
+            return None
+        try:
+            pip_mtime = os.stat(init_path).st_mtime
+            shims_mtime = os.stat(__file__).st_mtime
+        except OSError:
+            return None
+        return [
+            get_pip_version(self.import_path),
+            os.path.dirname(init_path),
+            pip_mtime,
+            shims_mtime,
+        ]
+
+    @property
+    def path(self):
+        # type: () -> Optional[str]
+        if self._key is None:
+            return None
+        digest = hashlib.sha1(json.dumps(self._key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "manifest-{}.json".format(digest[:16]))
+
+    def load(self):
+        # type: () -> None
+        self._loaded = True
+        self._key = self._compute_key()
+        path = self.path
+        if path is None or not os.path.isfile(path):
+            return
+        try:
+            with open(path, "r") as fh:
+                contents = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if contents.get("key") == self._key:
+            self.entries = contents.get("entries", {})
+
+    def get(self, name):
+        # type: (str) -> Optional[List[Any]]
+        if not self._loaded:
+            self.load()
+        return self.entries.get(name)
+
+    def record(self, name, path, found):
+        # type: (str, ShimmedPath, bool) -> None
+        if not self._loaded:
+            self.load()
+        entry = [
+            path.calculated_module_path,
+            path.name_to_import,
+            path.import_type,
+            found,
+        ]
+        if self.entries.get(name) != entry:
+            self.entries[name] = entry
+            self._dirty = True
+
+    def save(self):
+        # type: () -> None
+        path = self.path
+        if not self._dirty or path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as fh:
+                json.dump({"key": self._key, "entries": self.entries}, fh)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+        self._dirty = False
+
+
+_manifest = None  # type: Optional[ShimManifest]
+
+
+def set_manifest_dir(cache_dir):
+    # type: (Optional[str]) -> Optional[ShimManifest]
+    """
+    Enable (or disable, given ``None``) the on-disk shim resolution manifest.
+
+    The manifest is also enabled at import time when ``PIP_SHIMS_MANIFEST_DIR`` is set.
+
+    :param Optional[str] cache_dir: The directory to store manifests in
+    :return: The active manifest, if any
+    :rtype: Optional[ShimManifest]
+    """
+    global _manifest
+    if _manifest is not None:
+        _manifest.save()
+    _manifest = ShimManifest(cache_dir) if cache_dir else None
+    return _manifest
+
+
+def get_manifest():
+    # type: () -> Optional[ShimManifest]
+    return _manifest
+
+
+@atexit.register
+def _save_manifest():
+    # type: () -> None
+    if _manifest is not None:
+        _manifest.save()
+
+
+set_manifest_dir(os.environ.get("PIP_SHIMS_MANIFEST_DIR"))
+
+
 class ShimmedPathCollection(object):
 
     __registry = {}  # type: Dict[str, Any]
@@ -583,6 +779,10 @@ class ShimmedPathCollection(object):
         self.provided_mixins = []  # type: List[Type]
         self.pre_shim_functions = []  # type: List[Callable]
         self.aliases = []  # type: List[List[str]]
+        self._path_index = None  # type: Optional[Tuple[List[Any], List[ShimmedPath]]]
+        self._top_paths = {}  # type: Dict[Any, Optional[ShimmedPath]]
+        self._resolved = {}  # type: Dict[Any, Any]
+        self._lock = threading.RLock()
         if paths is not None:
             if isinstance(paths, str):
                 self.create_path(paths, version_start=lookup_current_pip_version())
@@ -602,6 +802,8 @@ class ShimmedPathCollection(object):
     def add_path(self, path):
         # type: (ShimmedPath) -> None
         self.paths.add(path)
+        self._path_index = None
+        self._top_paths.clear()
 
     def set_default(self, default):
         # type: (Any) -> None
@@ -619,14 +821,12 @@ class ShimmedPathCollection(object):
 
     def provide_function(self, name, fn):
         # type: (str, Union[Callable, ShimmedPath, ShimmedPathCollection]) -> None
-        if isinstance(fn, (ShimmedPath, ShimmedPathCollection)):
-            fn = resolve_possible_shim(fn)  # type: ignore
+        # Shims are stored unresolved and only resolved when this collection is
+        # shimmed, see :meth:`ShimmedPath._parse_provides_dict`
         self.provided_functions[name] = fn  # type: ignore
 
     def provide_method(self, name, fn):
         # type: (str, Union[Callable, ShimmedPath, ShimmedPathCollection, property]) -> None
-        if isinstance(fn, (ShimmedPath, ShimmedPathCollection)):
-            fn = resolve_possible_shim(fn)  # type: ignore
         self.provided_methods[name] = fn  # type: ignore
 
     def alias(self, aliases):
@@ -644,9 +844,10 @@ class ShimmedPathCollection(object):
 
     def add_mixin(self, mixin):
         # type: (Optional[Union[Type, ShimmedPathCollection]]) -> None
-        if isinstance(mixin, ShimmedPathCollection):
-            mixin = mixin.shim()
-        if mixin is not None and inspect.isclass(mixin):
+        # Collections are resolved lazily when the class is shimmed
+        if isinstance(mixin, ShimmedPathCollection) or (
+            mixin is not None and inspect.isclass(mixin)
+        ):
             self.provided_mixins.append(mixin)
 
     def create_path(self, import_path, version_start, version_end=None):
@@ -677,9 +878,52 @@ class ShimmedPathCollection(object):
         # type: () -> List[ShimmedPath]
         return sorted(self.paths, key=operator.attrgetter("version_range"), reverse=True)
 
+    def _build_path_index(self):
+        # type: () -> Tuple[List[Any], List[ShimmedPath]]
+        ordered = sorted(
+            self.paths, key=lambda path: path.version_range[0].parsed_version
+        )
+        starts = [path.version_range[0].parsed_version for path in ordered]
+        return starts, ordered
+
+    def get_path(self, pip_version=None):
+        # type: (Optional[Union[str, PipVersion]]) -> Optional[ShimmedPath]
+        """
+        Find the path providing this shim for a given pip version.
+
+        Paths are indexed by the start of their version range the first time this is
+        called, and the winner for each pip version is remembered, so lookups never
+        re-sort or re-parse versions.
+
+        :param Optional[Union[str, PipVersion]] pip_version: The pip version to look up,
+            defaults to the currently installed version
+        :return: The valid path with the latest range end, or the latest path overall
+            when no path is valid for **pip_version**
+        :rtype: Optional[ShimmedPath]
+        """
+        if pip_version is None:
+            pip_version = lookup_current_pip_version()
+        elif not isinstance(pip_version, PipVersion):
+            pip_version = pip_version_lookup(pip_version)
+        version = pip_version.parsed_version
+        if version in self._top_paths:
+            return self._top_paths[version]
+        if self._path_index is None:
+            self._path_index = self._build_path_index()
+        starts, ordered = self._path_index
+        started = ordered[: bisect.bisect_right(starts, version)]
+        valid = [p for p in started if version <= p.version_range[-1].parsed_version]
+        top_path = max(
+            valid or ordered,
+            key=lambda path: path.version_range[-1].parsed_version,
+            default=None,
+        )
+        self._top_paths[version] = top_path
+        return top_path
+
     def _get_top_path(self):
         # type: () -> Optional[ShimmedPath]
-        return next(iter(self._sort_paths()), None)
+        return self.get_path()
 
     @classmethod
     def traverse(cls, shim):
@@ -689,11 +933,64 @@ class ShimmedPathCollection(object):
             return result
         return shim
 
+    def _known_missing(self, top_path):
+        # type: (Optional[ShimmedPath]) -> bool
+        manifest = get_manifest()
+        if manifest is None or top_path is None or self.pre_shim_functions:
+            return False
+        entry = manifest.get(self.name)
+        return (
+            entry is not None
+            and entry[:2] == [top_path.calculated_module_path, top_path.name_to_import]
+            and not entry[3]
+        )
+
+    def _record(self, top_path, result):
+        # type: (Optional[ShimmedPath], Any) -> None
+        manifest = get_manifest()
+        if manifest is not None and top_path is not None:
+            found = result is not None and result is not nullcontext
+            manifest.record(self.name, top_path, found)
+
     def shim(self):
+        # type: () -> Any
+        """
+        Resolve this shim for the current pip version.
+
+        Results are memoized per pip version and resolution is single-flight: threads
+        asking for the same shim concurrently wait for one resolution instead of
+        racing each other.
+
+        :return: The resolved class, function, module, context manager or attribute
+        :rtype: Any
+        """
+        version = lookup_current_pip_version().parsed_version
+        try:
+            return self._resolved[version]
+        except KeyError:
+            pass
+        with self._lock:
+            if version not in self._resolved:
+                self._resolved[version] = self._shim()
+            return self._resolved[version]
+
+    def invalidate(self):
+        # type: () -> None
+        """Forget memoized results so the next :meth:`shim` resolves again."""
+        with self._lock:
+            self._resolved.clear()
+            self._top_paths.clear()
+
+    def _shim(self):
         # type: () -> Any
         top_path = self._get_top_path()  # type: Union[ShimmedPath, None]
-        if not self.pre_shim_functions:
+        if self._known_missing(top_path):
+            result = (
+                nullcontext if self.import_type == ImportTypes.CONTEXTMANAGER else None
+            )
+        elif not self.pre_shim_functions:
             result = self.traverse(top_path)
+            self._record(top_path, result)
         else:
             for fn in self.pre_shim_functions:
                 result = fn(top_path)
@@ -751,6 +1048,9 @@ DistributionNotFound.create_path("exceptions.DistributionNotFound", "7.0.0", "99
 FAVORITE_HASH = ShimmedPathCollection("FAVORITE_HASH", ImportTypes.ATTRIBUTE)
 FAVORITE_HASH.create_path("utils.hashes.FAVORITE_HASH", "7.0.0", "9999")
 
+Hashes = ShimmedPathCollection("Hashes", ImportTypes.CLASS)
+Hashes.create_path("utils.hashes.Hashes", "8.0.0", "9999")
+
 FormatControl = ShimmedPathCollection("FormatControl", ImportTypes.CLASS)
 FormatControl.create_path("models.format_control.FormatControl", "18.1", "9999")
 FormatControl.create_path("index.FormatControl", "7.0.0", "18.0")
@@ -780,6 +1080,9 @@ index_group.create_path("cmdoptions.index_group", "7.0.0", "18.0")
 InstallationError = ShimmedPathCollection("InstallationError", ImportTypes.CLASS)
 InstallationError.create_path("exceptions.InstallationError", "7.0.0", "9999")
 
+HashMismatch = ShimmedPathCollection("HashMismatch", ImportTypes.CLASS)
+HashMismatch.create_path("exceptions.HashMismatch", "8.0.0", "9999")
+
 UninstallationError = ShimmedPathCollection("UninstallationError", ImportTypes.CLASS)
 UninstallationError.create_path("exceptions.UninstallationError", "7.0.0", "9999")
 
@@ -868,6 +1171,21 @@ Link.provide_method("is_artifact", property(fallback_is_artifact))
 Link.create_path("models.link.Link", "19.0.0", "9999")
 Link.create_path("index.Link", "7.0.0", "18.1")
 
+InstallationCandidate = ShimmedPathCollection("InstallationCandidate", ImportTypes.CLASS)
+InstallationCandidate.create_path(
+    "models.candidate.InstallationCandidate", "18.1", "9999"
+)
+InstallationCandidate.create_path("index.InstallationCandidate", "7.0.0", "18.0")
+
+CandidateCache = ShimmedPathCollection("CandidateCache", ImportTypes.CLASS)
+CandidateCache.set_default(
+    functools.partial(
+        compat.CandidateCache,
+        candidate_provider=InstallationCandidate,
+        link_provider=Link,
+    )
+)
+
 make_abstract_dist = ShimmedPathCollection("make_abstract_dist", ImportTypes.FUNCTION)
 make_abstract_dist.create_path(
     "distributions.make_distribution_for_install_requirement", "20.0.0", "9999"
@@ -976,6 +1294,24 @@ shim_unpack.set_default(
         unpack_fn=unpack_url,
         downloader_provider=Downloader,
         tempdir_manager_provider=global_tempdir_manager,
+        favorite_hash_provider=FAVORITE_HASH,
+    )
+)
+
+stream_download = ShimmedPathCollection("stream_download", ImportTypes.FUNCTION)
+stream_download.set_default(
+    functools.partial(compat.stream_download, favorite_hash_provider=FAVORITE_HASH)
+)
+
+unpack_many = ShimmedPathCollection("unpack_many", ImportTypes.FUNCTION)
+unpack_many.set_default(
+    functools.partial(
+        compat.unpack_many,
+        unpack_fn=unpack_url,
+        downloader_provider=Downloader,
+        tempdir_manager_provider=global_tempdir_manager,
+        favorite_hash_provider=FAVORITE_HASH,
+        install_cmd_provider=InstallCommand,
     )
 )
 
@@ -983,14 +1319,14 @@ get_requirement_tracker = ShimmedPathCollection(
     "get_requirement_tracker", ImportTypes.CONTEXTMANAGER
 )
 get_requirement_tracker.set_default(
-    functools.partial(compat.get_tracker, RequirementTracker.shim())
+    functools.partial(compat.get_tracker, RequirementTracker)
 )
 get_requirement_tracker.create_path(
     "req.req_tracker.get_requirement_tracker", "7.0.0", "9999"
 )
 get_build_tracker = ShimmedPathCollection("get_build_tracker", ImportTypes.CONTEXTMANAGER)
 get_build_tracker.set_default(
-    functools.partial(compat.get_tracker, BuildTracker.shim(), tracker_type="BUILD")
+    functools.partial(compat.get_tracker, BuildTracker, tracker_type="BUILD")
 )
 get_build_tracker.create_path(
     "operations.build.build_tracker.get_build_tracker", "7.0.0", "9999"
@@ -1019,6 +1355,20 @@ VcsSupport = ShimmedPathCollection("VcsSupport", ImportTypes.CLASS)
 VcsSupport.create_path("vcs.VcsSupport", "7.0.0", "19.1.1")
 VcsSupport.create_path("vcs.versioncontrol.VcsSupport", "19.2", "9999")
 
+parse_wheel_filenames = ShimmedPathCollection(
+    "parse_wheel_filenames", ImportTypes.FUNCTION
+)
+parse_wheel_filenames.set_default(compat.parse_wheel_filenames)
+
+ScratchDirectoryPool = ShimmedPathCollection("ScratchDirectoryPool", ImportTypes.CLASS)
+ScratchDirectoryPool.set_default(compat.ScratchDirectoryPool)
+
+WheelBuildCache = ShimmedPathCollection("WheelBuildCache", ImportTypes.CLASS)
+WheelBuildCache.set_default(compat.WheelBuildCache)
+
+TagPriority = ShimmedPathCollection("TagPriority", ImportTypes.CLASS)
+TagPriority.set_default(compat.TagPriority)
+
 Wheel = ShimmedPathCollection("Wheel", ImportTypes.CLASS)
 Wheel.create_path("wheel.Wheel", "7.0.0", "19.3.9")
 Wheel.set_default(compat.Wheel)
@@ -1094,7 +1444,7 @@ get_package_finder.set_default(
     functools.partial(
         compat.get_package_finder,
         install_cmd_provider=InstallCommand,
-        target_python_builder=TargetPython.shim(),
+        target_python_builder=TargetPython,
     )
 )
 
@@ -1154,6 +1504,23 @@ resolve.set_default(
 )
 
 
+resolve_many = ShimmedPathCollection("resolve_many", ImportTypes.FUNCTION)
+resolve_many.set_default(
+    functools.partial(
+        compat.resolve_many,
+        install_cmd_provider=InstallCommand,
+        reqset_provider=get_requirement_set,
+        finder_provider=get_package_finder,
+        resolver_provider=get_resolver,
+        wheel_cache_provider=wheel_cache,
+        format_control_provider=FormatControl,
+        make_preparer_provider=make_preparer,
+        req_tracker_provider=get_requirement_tracker,
+        tempdir_manager_provider=global_tempdir_manager,
+    )
+)
+
+
 build_wheel = ShimmedPathCollection("build_wheel", ImportTypes.FUNCTION)
 build_wheel.set_default(
     functools.partial(
@@ -1167,5 +1534,6 @@ build_wheel.set_default(
         preparer_provider=make_preparer,
         format_control_provider=FormatControl,
         reqset_provider=get_requirement_set,
+        path_to_url_provider=path_to_url,
     )
 )
@@ -0,0 +1,236 @@
+# -*- coding=utf-8 -*-
+"""
+Resolve independent requirement sets in parallel on a pool of worker processes.
+"""
+from __future__ import absolute_import
+
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+from .compat import (
+    _use_worker_temp_dir,
+    get_default_options,
+    get_install_command,
+    resolve_possible_shim,
+)
+from .environment import MYPY_RUNNING
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+if MYPY_RUNNING:
+    from multiprocessing.context import BaseContext
+    from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+    TJob = Union[str, Sequence[str]]
+
+
+ResolvedRequirement = collections.namedtuple(
+    "ResolvedRequirement", ["name", "requirement", "link"]
+)
+ParallelResolveResult = collections.namedtuple(
+    "ParallelResolveResult", ["job", "result", "error", "wall_time", "peak_rss", "pid"]
+)
+
+
+def get_peak_rss():
+    # type: () -> Optional[int]
+    """
+    Get the peak resident set size of the current process.
+
+    This is a high-water mark over the lifetime of the process, not of a single job.
+
+    :return: The peak resident set size in bytes, or ``None`` if it can't be measured
+    :rtype: Optional[int]
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ``ru_maxrss`` is reported in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak_rss
+    return peak_rss * 1024
+
+
+def _initialize_worker(temp_dir):
+    # type: (str) -> None
+    """
+    Warm up a worker process before it receives any jobs.
+
+    Gives the worker its own temporary directory, so build and source directories
+    never collide with other workers, then imports pip and resolves the shims used
+    to resolve requirements.
+    """
+    _use_worker_temp_dir(temp_dir)
+
+    from . import shims
+
+    resolve_possible_shim(shims.install_req_from_line)
+    for provider in shims.resolve_many.keywords.values():
+        resolve_possible_shim(provider)
+    get_default_options(get_install_command(shims.InstallCommand))
+
+
+def _summarize(results):
+    # type: (Dict[str, Any]) -> Dict[str, ResolvedRequirement]
+    summary = {}
+    for name, ireq in results.items():
+        req = getattr(ireq, "req", None)
+        link = getattr(ireq, "link", None)
+        summary[name] = ResolvedRequirement(
+            name,
+            str(req) if req is not None else None,
+            getattr(link, "url", None),
+        )
+    return summary
+
+
+def _resolve_job(job, resolve_kwargs):
+    # type: (TJob, Dict[str, Any]) -> ParallelResolveResult
+    from . import shims
+
+    start = time.monotonic()
+    result, error = None, None
+    lines = [job] if isinstance(job, str) else list(job)
+    try:
+        ireqs = [shims.install_req_from_line(line) for line in lines]
+        resolved = shims.resolve_many(ireqs, combined=True, **resolve_kwargs)
+        if resolved and resolved[0].error is not None:
+            raise resolved[0].error
+        result = _summarize(resolved[0].result) if resolved else {}
+    except Exception as exc:
+        # Exceptions raised by pip don't always survive pickling
+        error = "{0}: {1}".format(type(exc).__name__, exc)
+    return ParallelResolveResult(
+        job, result, error, time.monotonic() - start, get_peak_rss(), os.getpid()
+    )
+
+
+class ResolverPool(object):
+    """
+    A pool of pre-warmed worker processes which resolve independent requirement sets.
+
+    Each job is a requirement line, or a sequence of lines resolved together, and
+    resolves to a :class:`ParallelResolveResult` holding the resolved requirements or
+    the error, along with the job's wall time. Its ``peak_rss`` is the high-water mark
+    of the worker's resident set size when the job finished, which covers every job
+    that worker has run so far rather than the job alone.
+    Workers get their own temporary directories and share the on-disk http and wheel
+    caches in **cache_dir**, which pip writes to atomically. Workers are spawned rather
+    than forked by default, since forking a process that is already running threads
+    can deadlock the children.
+
+    :param Optional[int] max_workers: The number of worker processes, defaults to the
+        number of CPUs
+    :param Optional[str] cache_dir: The pip cache directory shared by all workers
+    :param Optional[str] temp_dir: The directory to create worker temporary
+        directories in, defaults to the system temporary directory
+    :param mp_context: The multiprocessing context to start workers with, defaults to
+        the ``spawn`` context
+    :param resolve_kwargs: Keyword arguments passed to
+        :func:`~pip_shims.compat.resolve` for every job, these must be picklable
+    """
+
+    def __init__(
+        self,
+        max_workers=None,
+        cache_dir=None,
+        temp_dir=None,
+        mp_context=None,
+        **resolve_kwargs,
+    ):
+        # type: (Optional[int], Optional[str], Optional[str], Optional[BaseContext], Any) -> None  # noqa
+        if cache_dir is not None:
+            resolve_kwargs["cache_dir"] = cache_dir
+        if mp_context is None:
+            mp_context = multiprocessing.get_context("spawn")
+        self.resolve_kwargs = resolve_kwargs
+        self.mp_context = mp_context
+        # Workers exit without running atexit hooks, so their temporary directories
+        # live beneath one removed when the pool shuts down
+        self._temp_dir = TemporaryDirectory(prefix="pip-shims-pool-", dir=temp_dir)
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_initialize_worker,
+            initargs=(self._temp_dir.name,),
+        )
+
+    def __enter__(self):
+        # type: () -> ResolverPool
+        return self
+
+    def __exit__(self, *exc_info):
+        # type: (Any) -> None
+        self.shutdown()
+
+    def submit(self, job):
+        # type: (TJob) -> concurrent.futures.Future
+        """
+        Schedule **job** for resolution.
+
+        :param job: A requirement line or a sequence of lines to resolve together
+        :return: A future for the job's :class:`ParallelResolveResult`
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        return self._executor.submit(_resolve_job, job, self.resolve_kwargs)
+
+    def map(self, jobs):
+        # type: (Iterable[TJob]) -> List[ParallelResolveResult]
+        """
+        Resolve every job in **jobs**, returning the results in order.
+
+        :param jobs: Requirement lines or sequences of lines to resolve together
+        :return: A :class:`ParallelResolveResult` for each job
+        :rtype: List[ParallelResolveResult]
+        """
+        futures = [self.submit(job) for job in jobs]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        # type: (bool) -> None
+        self._executor.shutdown(wait=wait)
+        if wait:
+            self._temp_dir.cleanup()
+
+
+def resolve_parallel(
+    jobs, max_workers=None, cache_dir=None, mp_context=None, **resolve_kwargs
+):
+    # type: (Iterable[TJob], Optional[int], Optional[str], Optional[BaseContext], Any) -> List[ParallelResolveResult]  # noqa
+    """
+    Resolve independent requirement sets on a temporary :class:`ResolverPool`.
+
+    :param jobs: Requirement lines or sequences of lines to resolve together
+    :param Optional[int] max_workers: The number of worker processes, defaults to the
+        number of CPUs
+    :param Optional[str] cache_dir: The pip cache directory shared by all workers
+    :param mp_context: The multiprocessing context to start workers with, defaults to
+        the ``spawn`` context
+    :param resolve_kwargs: Keyword arguments passed to
+        :func:`~pip_shims.compat.resolve` for every job
+    :return: A :class:`ParallelResolveResult` for each job, in order
+    :rtype: List[ParallelResolveResult]
+
+    :Example:
+
+    >>> from pip_shims.parallel import resolve_parallel
+    >>> for result in resolve_parallel(["requests", ["six", "idna"]], max_workers=2):
+    ...     print(result.job, sorted(result.result), round(result.wall_time, 2))
+    requests ['certifi', 'chardet', 'idna', 'requests', 'urllib3'] 1.42
+    ['six', 'idna'] ['idna', 'six'] 0.61
+    """
+    with ResolverPool(
+        max_workers=max_workers,
+        cache_dir=cache_dir,
+        mp_context=mp_context,
+        **resolve_kwargs,
+    ) as pool:
+        return pool.map(jobs)
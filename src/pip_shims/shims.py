@@ -14,6 +14,7 @@ from .models import (
     get_package_finder,
     import_pip,
     lookup_current_pip_version,
+    reset_current_pip_version,
 )
 
 
@@ -25,7 +26,8 @@ class _shims(types.ModuleType):
         return parse_version(version)
 
     def __dir__(self):
-        result = list(self._locations.keys()) + list(self.__dict__.keys())
+        result = list(self._locations.keys())
+        result.extend(key for key in self.__dict__.keys() if key not in self._locations)
         result.extend(
             (
                 "__file__",
@@ -49,16 +51,56 @@ class _shims(types.ModuleType):
         return list(self._locations.keys())
 
     def __init__(self):
-        self.pip = import_pip()
         self._locations = ShimmedPathCollection.get_registry()
         self._locations["get_package_finder"] = get_package_finder
         self.pip_version = str(lookup_current_pip_version())
         self.parsed_pip_version = lookup_current_pip_version()
 
+    def invalidate_cache(self, *names):
+        """
+        Drop memoized shims so they are resolved again on next access.
+
+        This also clears the results memoized by each shim's
+        :class:`~pip_shims.models.ShimmedPathCollection` and forgets the cached pip
+        version, so shims resolve against pip as it is installed right now. Both the
+        ``pip_shims`` and ``pip_shims.shims`` modules are invalidated.
+
+        :param str names: The names of the shims to invalidate, invalidates every
+            resolved shim if none are provided
+        :return: None
+        :rtype: None
+        """
+        reset_current_pip_version()
+        version = lookup_current_pip_version()
+        if not names:
+            names = tuple(self._locations.keys())
+        modules = {id(self): self}
+        for module_name in ("pip_shims", __name__):
+            module = sys.modules.get(module_name)
+            if isinstance(module, _shims):
+                modules[id(module)] = module
+        for module in modules.values():
+            module.pip_version = str(version)
+            module.parsed_pip_version = version
+            for name in names:
+                module.__dict__.pop(name, None)
+        for name in names:
+            invalidate = getattr(self._locations.get(name), "invalidate", None)
+            if invalidate is not None:
+                invalidate()
+
     def __getattr__(self, *args, **kwargs):
         locations = super(_shims, self).__getattribute__("_locations")
         if args[0] in locations:
-            return locations[args[0]].shim()
+            # Store the resolved shim on the module so later lookups never
+            # reach ``__getattr__``, see :meth:`invalidate_cache`
+            result = locations[args[0]].shim()
+            self.__dict__[args[0]] = result
+            return result
+        if args[0] == "pip":
+            # pip itself is only imported on first access to keep imports cheap
+            self.pip = import_pip()
+            return self.pip
         return super(_shims, self).__getattribute__(*args, **kwargs)
 
 
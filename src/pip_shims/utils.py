@@ -4,16 +4,20 @@ Shared utility functions which are not specific to any particular module.
 """
 from __future__ import absolute_import
 
+import collections
 import contextlib
 import copy
+import functools
 import inspect
 import sys
+import threading
+import weakref
 from collections.abc import Callable
 from functools import wraps
 
 from packaging.version import _BaseVersion, parse
 
-from .environment import MYPY_RUNNING
+from .environment import MYPY_RUNNING, get_pip_version
 
 if MYPY_RUNNING:
     from types import ModuleType
@@ -83,17 +87,120 @@ def make_classmethod(fn):
     return classmethod_creator
 
 
-def memoize(obj):
-    # type: (Any) -> Callable
-    cache = obj.cache = {}
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"]
+)
+_MISSING = object()
+_KWARGS_MARK = object()
+
+
+class LRUCache(object):
+    """
+    A thread-safe mapping which holds at most **maxsize** entries, evicting the least
+    recently used entry when it is full.
+
+    :param Optional[int] maxsize: The maximum number of entries to hold, or ``None``
+        for an unbounded cache
+    """
+
+    def __init__(self, maxsize=128):
+        # type: (Optional[int]) -> None
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()  # type: Dict[Any, Any]
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        # type: () -> int
+        return len(self._data)
+
+    def __contains__(self, key):
+        # type: (Any) -> bool
+        return key in self._data
+
+    def get(self, key, default=None):
+        # type: (Any, Any) -> Any
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        # type: (Any, Any) -> None
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        # type: (Any, Any) -> Any
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        # type: () -> None
+        """Remove every entry and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        # type: () -> CacheInfo
+        return CacheInfo(
+            self.hits, self.misses, self.evictions, self.maxsize, len(self._data)
+        )
+
+
+def make_cache_key(args, kwargs):
+    # type: (Tuple[Any, ...], Dict[str, Any]) -> Tuple[Any, ...]
+    if not kwargs:
+        return args
+    return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+
+
+def memoize(obj=None, maxsize=1024):
+    # type: (Optional[Callable], Optional[int]) -> Callable
+    """
+    Cache the results of a function in an :class:`LRUCache` keyed by its arguments.
+
+    Can be applied directly (``@memoize``) or with arguments
+    (``@memoize(maxsize=None)``). Calls with unhashable arguments are not cached. The
+    decorated function exposes the cache as ``cache`` along with ``cache_info()`` and
+    ``cache_clear()``.
+
+    :param Callable obj: The function to memoize
+    :param Optional[int] maxsize: The maximum number of results to keep, defaults to
+        1024, ``None`` keeps every result
+    :return: The memoized function
+    :rtype: Callable
+    """
+    if obj is None:
+        return functools.partial(memoize, maxsize=maxsize)
+    cache = obj.cache = LRUCache(maxsize=maxsize)
 
     @wraps(obj)
     def memoizer(*args, **kwargs):
-        key = str(args) + str(kwargs)
-        if key not in cache:
-            cache[key] = obj(*args, **kwargs)
-        return cache[key]
-
+        key = make_cache_key(args, kwargs)
+        try:
+            result = cache.get(key, _MISSING)
+        except TypeError:
+            return obj(*args, **kwargs)
+        if result is _MISSING:
+            result = obj(*args, **kwargs)
+            cache.set(key, result)
+        return result
+
+    memoizer.cache_info = cache.info
+    memoizer.cache_clear = cache.clear
     return memoizer
 
 
@@ -374,16 +481,71 @@ def suppress_setattr(obj, attr, value, filter_none=False):
         pass
 
 
+_allowed_args_cache = weakref.WeakKeyDictionary()  # type: Dict[Any, Tuple[Any, ...]]
+_bound_allowed_args_cache = (
+    weakref.WeakKeyDictionary()
+)  # type: Dict[Any, Tuple[Any, ...]]
+
+
+def _signature_token(fn_or_class):
+    # type: (Union[Callable, Type]) -> Tuple[Any, ...]
+    """The objects a callable's signature is derived from, used to detect changes."""
+    if inspect.isclass(fn_or_class):
+        # Defaults are rewritten in place by ``set_default_kwargs``, so the
+        # constructors' defaults are part of the token as well as their identities
+        return (
+            (type(fn_or_class).__call__, fn_or_class.__new__, fn_or_class.__init__)
+            + _signature_token(fn_or_class.__new__)
+            + _signature_token(fn_or_class.__init__)
+        )
+    if isinstance(fn_or_class, functools.partial):
+        return (fn_or_class.args, fn_or_class.keywords) + _signature_token(
+            fn_or_class.func
+        )
+    func = getattr(fn_or_class, "__func__", fn_or_class)
+    return (
+        getattr(func, "__code__", None),
+        getattr(func, "__defaults__", None),
+        getattr(func, "__kwdefaults__", None),
+        getattr(func, "__signature__", None),
+    )
+
+
 def get_allowed_args(fn_or_class):
     # type: (Union[Callable, Type]) -> Tuple[List[str], Dict[str, Any]]
     """
     Given a callable or a class, returns the arguments and default kwargs passed in.
 
+    Results are cached per callable (bound methods share an entry per underlying
+    function) and recomputed if the callable's code, defaults or constructor change.
+
     :param Union[Callable, Type] fn_or_class: A function, method or class to inspect.
     :return: A 2-tuple with a list of arguments and a dictionary of keywords mapped to
         default values.
     :rtype: Tuple[List[str], Dict[str, Any]]
     """
+    if inspect.ismethod(fn_or_class):
+        cache, key = _bound_allowed_args_cache, fn_or_class.__func__
+    else:
+        cache, key = _allowed_args_cache, fn_or_class
+    token = _signature_token(fn_or_class)
+    try:
+        cached = cache.get(key)
+    except TypeError:
+        cached, cache = None, None
+    if cached is not None and all(a is b for a, b in zip(cached[0], token)):
+        return list(cached[1]), dict(cached[2])
+    args, kwargs = _get_allowed_args(fn_or_class)
+    if cache is not None:
+        try:
+            cache[key] = (token, tuple(args), kwargs)
+        except TypeError:
+            pass
+    return list(args), dict(kwargs)
+
+
+def _get_allowed_args(fn_or_class):
+    # type: (Union[Callable, Type]) -> Tuple[List[str], Dict[str, Any]]
     args = []
     kwargs = {}
     signature = inspect.signature(fn_or_class)
@@ -397,6 +559,86 @@ def get_allowed_args(fn_or_class):
     return args, kwargs
 
 
+class CallAdapter(object):
+    """
+    A precomputed plan for calling a pip callable whose parameters vary by version.
+
+    The callable's parameters are inspected once when the adapter is built. Calling
+    the adapter renames any keyword arguments the callable knows by another name and
+    drops the ones it does not accept, without inspecting the callable again.
+
+    :param Callable fn: The function, method or unbound ``__init__`` to adapt to
+    :param Optional[Dict[str, str]] renames: A mapping of provided keyword names to
+        the name the callable uses instead, applied only when the callable accepts the
+        new name but not the provided one
+    """
+
+    __slots__ = ("arg_names", "accepts_var_kwargs", "renames", "_accepted")
+
+    def __init__(self, fn, renames=None):
+        # type: (Callable, Optional[Dict[str, str]]) -> None
+        _, inspected_args = get_method_args(fn)
+        arg_names = ()  # type: Tuple[str, ...]
+        if inspected_args is not None:
+            arg_names = tuple(
+                arg for arg in inspected_args.args if arg not in ("self", "cls")
+            )
+        self.arg_names = arg_names
+        # Without a code object to inspect, pass everything through untouched
+        self.accepts_var_kwargs = (
+            inspected_args is None or inspected_args.varkw is not None
+        )
+        self.renames = tuple(
+            (provided, target)
+            for provided, target in (renames or {}).items()
+            if provided not in arg_names and target in arg_names
+        )  # type: Tuple[Tuple[str, str], ...]
+        self._accepted = frozenset(arg_names).union(
+            provided for provided, _ in self.renames
+        )
+
+    def accepts(self, name):
+        # type: (str) -> bool
+        return name in self._accepted
+
+    def __call__(self, fn, *args, **kwargs):
+        # type: (Callable, Any, Any) -> Any
+        for provided, target in self.renames:
+            if provided in kwargs:
+                kwargs[target] = kwargs.pop(provided)
+        if not self.accepts_var_kwargs:
+            kwargs = {name: kwargs[name] for name in self.arg_names if name in kwargs}
+        return fn(*args, **kwargs)
+
+
+_call_adapters = weakref.WeakKeyDictionary()  # type: Dict[Any, Dict[Any, CallAdapter]]
+
+
+def get_call_adapter(fn, renames=None):
+    # type: (Callable, Optional[Dict[str, str]]) -> CallAdapter
+    """
+    Get the :class:`CallAdapter` for a callable on the current pip version.
+
+    Adapters are built once per (callable, pip version, renames) and then reused.
+
+    :param Callable fn: The function, method or unbound ``__init__`` to adapt to
+    :param Optional[Dict[str, str]] renames: Keyword renames, see :class:`CallAdapter`
+    :return: A cached adapter for **fn**
+    :rtype: :class:`CallAdapter`
+    """
+    code = getattr(getattr(fn, "__func__", fn), "__code__", None)
+    if code is None:
+        return CallAdapter(fn, renames=renames)
+    key = (get_pip_version(), tuple(sorted((renames or {}).items())))
+    adapters = _call_adapters.get(code)
+    if adapters is None:
+        adapters = _call_adapters.setdefault(code, {})
+    adapter = adapters.get(key)
+    if adapter is None:
+        adapter = adapters[key] = CallAdapter(fn, renames=renames)
+    return adapter
+
+
 def call_function_with_correct_args(fn, **provided_kwargs):
     # type: (Callable, Dict[str, Any]) -> Any
     """
@@ -1,6 +1,7 @@
 # -*- coding=utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 
+import contextlib
 import os
 import sys
 import textwrap
@@ -566,3 +567,860 @@ def test_build_wheel():
         )
         wheel = next(iter(build_wheel(req=ireq, **kwargs)))
         assert os.path.exists(wheel)
+
+
+def test_import_does_not_load_pip_internals():
+    import subprocess
+
+    code = (
+        "import sys, pip_shims; "
+        "print(any(m.startswith('pip._internal') for m in sys.modules))"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.decode("utf-8").strip() == "False"
+
+
+def test_shims_are_memoized():
+    import pip_shims
+
+    link_cls = pip_shims.Link
+    assert pip_shims.Link is link_cls
+    assert "Link" in vars(pip_shims)
+    pip_shims.invalidate_cache("Link")
+    assert "Link" not in vars(pip_shims)
+    assert pip_shims.Link.__name__ == link_cls.__name__
+
+
+def test_invalidate_cache_rereads_pip_version(monkeypatch):
+    import pip
+
+    import pip_shims
+    from pip_shims import models
+
+    pip_shims.Link, pip_shims.shims.Link
+    monkeypatch.setattr(models, "CURRENT_PIP_VERSION", models.PipVersion("19.0"))
+    pip_shims.invalidate_cache()
+    assert "Link" not in vars(pip_shims)
+    assert "Link" not in vars(pip_shims.shims)
+    assert str(models.CURRENT_PIP_VERSION) == pip.__version__
+    assert pip_shims.shims.pip_version == pip.__version__
+
+
+@pytest.mark.parametrize(
+    "version, expected",
+    [
+        ("19.0", "resolve.Resolver"),
+        ("19.3.1", "legacy_resolve.Resolver"),
+        ("22.1.2", "resolution.legacy.resolver.Resolver"),
+    ],
+)
+def test_shimmed_path_lookup(version, expected):
+    from pip_shims.models import Resolver
+
+    assert Resolver.get_path(version).full_import_path == expected
+
+
+def test_get_pip_version_without_import():
+    import subprocess
+
+    import pip
+
+    code = (
+        "import sys; from pip_shims.environment import get_pip_version; "
+        "print(get_pip_version(), 'pip' in sys.modules)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.decode("utf-8").split() == [pip.__version__, "False"]
+
+
+def test_shim_manifest(tmpdir, monkeypatch):
+    from pip_shims.models import (
+        ImportTypes,
+        ShimManifest,
+        ShimmedPath,
+        ShimmedPathCollection,
+        set_manifest_dir,
+    )
+
+    def fallback():
+        pass
+
+    missing = ShimmedPathCollection("manifest_missing", ImportTypes.FUNCTION)
+    missing.set_default(fallback)
+    missing.create_path("pip_shims_tests.missing", "7.0.0", "9999")
+    manifest = set_manifest_dir(tmpdir.strpath)
+    try:
+        assert missing.shim() is fallback
+        manifest.save()
+        entry = ShimManifest(tmpdir.strpath).get("manifest_missing")
+        assert entry == manifest.get("manifest_missing")
+        assert entry[1] == "missing" and entry[3] is False
+        # a fresh manifest skips the import known to fail
+        set_manifest_dir(tmpdir.strpath)
+        missing.invalidate()
+        monkeypatch.setattr(
+            ShimmedPath, "_import_module", lambda *args: pytest.fail("imported")
+        )
+        assert missing.shim() is fallback
+    finally:
+        set_manifest_dir(None)
+
+
+def test_failed_imports_are_cached(monkeypatch):
+    from pip_shims.models import ShimmedPath
+
+    ShimmedPath.clear_import_cache()
+    missing = "pip_shims_tests.missing_module"
+    assert ShimmedPath._import_module(missing) is None
+    assert ShimmedPath._import_module(missing) is None
+    info = ShimmedPath.import_cache_info()
+    assert info["misses"] == 1 and info["negative_hits"] == 1
+    monkeypatch.syspath_prepend(os.getcwd())
+    assert ShimmedPath._import_module(missing) is None
+    assert ShimmedPath.import_cache_info()["misses"] == 2
+
+
+def test_concurrent_shim_resolution():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from pip_shims.models import ShimmedPathCollection
+
+    registry = ShimmedPathCollection.get_registry()
+    for collection in registry.values():
+        collection.invalidate()
+
+    def resolve_all(_):
+        return {name: collection.shim() for name, collection in registry.items()}
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(resolve_all, range(32)))
+    for name in registry:
+        assert all(result[name] is results[0][name] for result in results), name
+
+
+def test_memoize_lru():
+    from pip_shims.utils import memoize
+
+    calls = []
+
+    @memoize(maxsize=2)
+    def double(value):
+        calls.append(value)
+        return value * 2
+
+    assert [double(1), double(1), double(2), double(3), double(1)] == [2, 2, 4, 6, 2]
+    assert calls == [1, 2, 3, 1]
+    info = double.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (1, 4, 2, 2)
+    assert double([1]) == [1, 1]
+    double.cache_clear()
+    assert double.cache_info().currsize == 0
+
+
+def test_allowed_args_cache():
+    from pip_shims.utils import get_allowed_args
+
+    def build(name, summary, isolated=False):
+        pass
+
+    assert get_allowed_args(build) == (["name", "summary"], {"isolated": False})
+    assert get_allowed_args(build) == (["name", "summary"], {"isolated": False})
+    build.__defaults__ = ("Summary", False)
+    assert get_allowed_args(build) == (
+        ["name"],
+        {"summary": "Summary", "isolated": False},
+    )
+
+
+def test_allowed_args_cache_tracks_class_defaults():
+    from pip_shims.utils import get_allowed_args, set_default_kwargs
+
+    class Builder(object):
+        def __init__(self, a, b, c=1):
+            pass
+
+    assert get_allowed_args(Builder) == (["a", "b"], {"c": 1})
+    set_default_kwargs(Builder, "__init__", b=5)
+    assert get_allowed_args(Builder) == (["a"], {"b": 5, "c": 1})
+
+
+def test_call_adapter():
+    from pip_shims.utils import get_call_adapter
+
+    def unpack(link, location, download, download_dir=None):
+        return link, location, download, download_dir
+
+    adapter = get_call_adapter(unpack, renames={"downloader": "download"})
+    assert get_call_adapter(unpack, renames={"downloader": "download"}) is adapter
+    assert adapter.accepts("downloader") and not adapter.accepts("hashes")
+    result = adapter(unpack, link=1, location=2, downloader=3, hashes=None)
+    assert result == (1, 2, 3, None)
+
+
+def test_session_pool():
+    from pip_shims.compat import SessionPool
+
+    cmd = InstallCommand()
+    options, _ = cmd.parser.parse_args([])
+    pool = SessionPool(maxsize=1)
+    session = get_session(install_cmd=cmd, options=options, session_pool=pool)
+    assert get_session(install_cmd=cmd, options=options, session_pool=pool) is session
+    closed = []
+    session.close = lambda: closed.append(session)
+    other_options, _ = cmd.parser.parse_args(["--timeout", "3"])
+    other = get_session(install_cmd=cmd, options=other_options, session_pool=pool)
+    assert other is not session and len(pool) == 1
+    # the evicted session may still be in use, so it is dropped without closing it
+    assert closed == []
+    other.close = lambda: closed.append(other)
+    # a forked child never reuses, or closes, the sessions it inherited
+    pool._pid = -1
+    child = get_session(install_cmd=cmd, options=other_options, session_pool=pool)
+    assert child is not other and closed == []
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_default_options_cache(monkeypatch):
+    from pip_shims.compat import get_default_options, get_install_command
+
+    cmd = get_install_command(InstallCommand)
+    assert get_install_command(InstallCommand) is cmd
+    options = get_default_options(cmd)
+    extra_index_urls = list(options.extra_index_urls)
+    options.extra_index_urls.append("https://example.com/simple")
+    options.timeout = 1
+    options.format_control.no_binary.add(":all:")
+    fresh = get_default_options(cmd)
+    assert fresh is not options
+    assert fresh.extra_index_urls == extra_index_urls and fresh.timeout != 1
+    assert ":all:" not in fresh.format_control.no_binary
+    monkeypatch.setenv("PIP_TIMEOUT", "7")
+    assert get_default_options(cmd).timeout == 7
+
+
+def test_finder_cache():
+    from pip_shims.compat import clear_finder_cache, get_finder_cache
+
+    clear_finder_cache()
+    cmd = InstallCommand()
+    options, _ = cmd.parser.parse_args([])
+    session = cmd._build_session(options)
+    finder = get_package_finder(install_cmd=cmd, options=options, session=session)
+    assert get_package_finder(install_cmd=cmd, options=options, session=session) is finder
+    other_options, _ = cmd.parser.parse_args(
+        ["--index-url", "https://example.com/simple"]
+    )
+    other = get_package_finder(install_cmd=cmd, options=other_options, session=session)
+    assert other is not finder
+    assert get_finder_cache().info().currsize == 2
+    uncached = get_package_finder(
+        install_cmd=cmd, options=options, session=session, cached=False
+    )
+    assert uncached is not finder
+    clear_finder_cache()
+    assert len(get_finder_cache()) == 0
+    session.close()
+
+
+def test_resolve_many():
+    import contextlib
+
+    from pip_shims.compat import resolve_many
+
+    calls = {"finder": 0, "preparer": 0, "resolver": 0}
+
+    class StubIreq(object):
+        def __init__(self, name):
+            self.name = name
+
+        def build_location(self, build_dir, autodelete, parallel_builds):
+            return build_dir
+
+    class StubReqSet(object):
+        def __init__(self):
+            self.requirements = {}
+
+        def add_requirement(self, ireq):
+            self.requirements[ireq.name] = ireq
+
+    class StubResolver(object):
+        def resolve(self, requirement_set, check_supported_wheels):
+            if "broken" in requirement_set.requirements:
+                raise InstallationError("broken")
+            return requirement_set
+
+    def finder_provider(*args, **kwargs):
+        calls["finder"] += 1
+        return object()
+
+    @contextlib.contextmanager
+    def make_preparer_provider(**kwargs):
+        calls["preparer"] += 1
+        yield object()
+
+    def resolver_provider(**kwargs):
+        calls["resolver"] += 1
+        return StubResolver()
+
+    provider_kwargs = dict(
+        install_cmd_provider=InstallCommand,
+        reqset_provider=lambda *args, **kwargs: StubReqSet(),
+        finder_provider=finder_provider,
+        resolver_provider=resolver_provider,
+        wheel_cache_provider=lambda *args: contextlib.nullcontext(),
+        format_control_provider=FormatControl,
+        make_preparer_provider=make_preparer_provider,
+        tempdir_manager_provider=contextlib.nullcontext,
+        session=object(),
+    )
+    ireqs = [StubIreq(name) for name in ("six", "broken", "idna")]
+    results = resolve_many(ireqs, **provider_kwargs)
+    assert [result.ireq for result in results] == ireqs
+    assert sorted(results[0].result) == ["six"] and results[0].error is None
+    assert results[1].result is None and isinstance(results[1].error, InstallationError)
+    assert calls == {"finder": 1, "preparer": 1, "resolver": 3}
+    combined = resolve_many([ireqs[0], ireqs[2]], combined=True, **provider_kwargs)
+    assert combined[0].result is combined[1].result
+    assert sorted(combined[0].result) == ["idna", "six"]
+
+
+def test_resolve_parallel(tmpdir, monkeypatch):
+    import multiprocessing
+
+    from pip_shims import shims
+    from pip_shims.compat import ResolveResult
+    from pip_shims.parallel import ResolvedRequirement, ResolverPool
+
+    def resolve_many(ireqs, combined=False, **kwargs):
+        assert combined and kwargs == {"cache_dir": tmpdir.strpath}
+        if any(ireq.name == "broken" for ireq in ireqs):
+            error = DistributionNotFound("No matching distribution found for broken")
+            return [ResolveResult(ireq, None, error) for ireq in ireqs]
+        result = {ireq.name: ireq for ireq in ireqs}
+        return [ResolveResult(ireq, result, None) for ireq in ireqs]
+
+    with ResolverPool(max_workers=1) as pool:
+        assert pool.mp_context.get_start_method() == "spawn"
+        # Spawned workers warm up from scratch before running anything
+        assert pool._executor.submit(os.getpid).result() != os.getpid()
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("Workers must inherit the stubbed resolver")
+    monkeypatch.setattr(shims, "resolve_many", partial(resolve_many))
+    fork_context = multiprocessing.get_context("fork")
+    with ResolverPool(
+        max_workers=2, cache_dir=tmpdir.strpath, mp_context=fork_context
+    ) as pool:
+        results = pool.map(["six==1.16.0", ["idna==3.4", "broken"]])
+    six, broken = results
+    assert six.job == "six==1.16.0" and six.error is None
+    assert six.result == {"six": ResolvedRequirement("six", "six==1.16.0", None)}
+    assert broken.result is None
+    assert broken.error == (
+        "DistributionNotFound: No matching distribution found for broken"
+    )
+    for result in results:
+        assert result.wall_time >= 0 and result.pid != os.getpid()
+        assert result.peak_rss is None or result.peak_rss > 0
+
+
+def test_async_runner():
+    import asyncio
+    import time
+
+    from pip_shims.aio import AsyncRunner
+
+    runner = AsyncRunner(limits={"sleep": 1})
+
+    async def main():
+        finders = await asyncio.gather(
+            runner.get_package_finder(install_cmd=InstallCommand()),
+            runner.get_package_finder(install_cmd=InstallCommand()),
+        )
+        with pytest.raises(asyncio.TimeoutError):
+            await runner.run("sleep", time.sleep, 0.5, timeout=0.05)
+        return finders
+
+    try:
+        finders = asyncio.run(main())
+    finally:
+        runner.close()
+    assert all(isinstance(finder, PackageFinder) for finder in finders)
+
+
+def test_async_global_state_operations(tmpdir, monkeypatch):
+    import asyncio
+    import tarfile
+    import threading
+    import time
+
+    from pip_shims import shims
+    from pip_shims.aio import AsyncRunner
+
+    served = tmpdir.mkdir("served")
+    for name in ("six", "idna"):
+        source = tmpdir.mkdir(name).mkdir("{}-1.0".format(name))
+        source.join("setup.py").write("")
+        archive_path = served.join("{}-1.0.tar.gz".format(name)).strpath
+        with tarfile.open(archive_path, "w:gz") as archive:
+            archive.add(source.strpath, arcname="{}-1.0".format(name))
+    lock, active, overlaps = threading.Lock(), [], []
+
+    def tracked(func):
+        def wrapper(*args, **kwargs):
+            with lock:
+                active.append(func)
+                overlaps.append(len(active))
+            try:
+                time.sleep(0.05)
+                return func(*args, **kwargs)
+            finally:
+                with lock:
+                    active.remove(func)
+
+        return wrapper
+
+    monkeypatch.setattr(shims, "shim_unpack", tracked(shims.shim_unpack))
+    monkeypatch.setattr(shims, "resolve", tracked(lambda ireq: ireq))
+    runner = AsyncRunner()
+    session = get_session(install_cmd=InstallCommand())
+
+    async def main(base_url):
+        unpacks = [
+            runner.shim_unpack(
+                link=Link(base_url + "{}-1.0.tar.gz".format(name)),
+                download_dir=tmpdir.mkdir(name + "-download").strpath,
+                location=tmpdir.mkdir(name + "-src").strpath,
+                session=session,
+            )
+            for name in ("six", "idna")
+        ]
+        return await asyncio.gather(runner.resolve("six"), *unpacks)
+
+    try:
+        with serve_directory(served.strpath) as base_url:
+            resolved, _, _ = asyncio.run(main(base_url))
+    finally:
+        runner.close()
+    assert resolved == "six" and overlaps == [1, 1, 1]
+    assert tmpdir.join("six-src", "setup.py").exists()
+    assert tmpdir.join("idna-src", "setup.py").exists()
+
+
+def test_candidate_cache(tmpdir):
+    from pip_shims.shims import CandidateCache
+
+    links_dir = tmpdir.mkdir("links")
+    wheel_path = links_dir.join("six-1.16.0-py2.py3-none-any.whl")
+    wheel_path.write("")
+    cache_dir = tmpdir.join("candidates").strpath
+    cmd = InstallCommand()
+    options, _ = cmd.parser.parse_args(["--no-index", "--find-links", links_dir.strpath])
+
+    def make_finder(candidate_cache):
+        return get_package_finder(
+            install_cmd=cmd,
+            options=options,
+            cached=False,
+            candidate_cache=candidate_cache,
+        )
+
+    candidates = make_finder(CandidateCache(cache_dir)).find_all_candidates("six")
+    assert [str(c.version) for c in candidates] == ["1.16.0"]
+    wheel_path.remove()
+    # a new finder and cache read the candidates back from disk, not the index
+    finder = make_finder(CandidateCache(cache_dir))
+    assert finder.find_all_candidates("Six") == candidates
+    finder = make_finder(CandidateCache(cache_dir, ttl=0))
+    assert finder.find_all_candidates("six") == []
+
+
+def test_candidate_cache_with_finder_cache(tmpdir):
+    from pip_shims.shims import CandidateCache
+    from pip_shims.utils import LRUCache
+
+    cmd = InstallCommand()
+    options, _ = cmd.parser.parse_args(["--no-index"])
+    finder_cache = LRUCache(maxsize=4)
+    candidate_cache = CandidateCache(tmpdir.strpath)
+
+    def make_finder(**kwargs):
+        return get_package_finder(
+            install_cmd=cmd, options=options, finder_cache=finder_cache, **kwargs
+        )
+
+    wrapped = make_finder(candidate_cache=candidate_cache)
+    assert "find_all_candidates" in vars(wrapped)
+    assert make_finder(candidate_cache=candidate_cache) is wrapped
+    # callers without the candidate cache never get the finder wrapped by it
+    plain = make_finder()
+    assert plain is not wrapped and "find_all_candidates" not in vars(plain)
+    assert make_finder() is plain
+
+
+def test_tag_priority():
+    from packaging.tags import Tag
+
+    from pip_shims.compat import TagPriority
+    from pip_shims.compat import Wheel as CompatWheel
+
+    tags = [Tag("cp38", "cp38", "manylinux1_x86_64"), ("py3", "none", "any")]
+    priority = TagPriority.for_tags(tags)
+    assert TagPriority.for_tags(tags) is priority
+    assert priority.rank(("cp38", "cp38", "manylinux1_x86_64")) == 0
+    assert Tag("py3", "none", "any") in priority
+    wheels = [
+        CompatWheel("six-1.0-py3-none-any.whl"),
+        CompatWheel("six-1.0-cp37-cp37m-win32.whl"),
+        CompatWheel("six-1.0-cp38-cp38-manylinux1_x86_64.whl"),
+    ]
+    assert priority.rank_wheels(wheels) == [1, None, 0]
+    assert priority.sort_wheels(wheels) == [wheels[2], wheels[0]]
+    assert wheels[0].support_index_min(tags) == 1 and wheels[0].supported(tags)
+    assert not wheels[1].supported(tags)
+    with pytest.raises(ValueError):
+        wheels[1].support_index_min(tags)
+
+
+def test_parse_wheel_filenames():
+    from pip_shims.compat import InvalidWheelFilename, parse_wheel_filenames
+
+    filenames = [
+        "pytoml-0.1.18-cp36-none-any.whl",
+        "six-1.16.0-1-py2.py3-none-any.whl",
+        "zope.interface-5.4.0-cp38-cp38-manylinux_2_5_x86_64.manylinux1_x86_64.whl",
+    ]
+    parsed = parse_wheel_filenames(filenames + ["six-1.16.0.tar.gz"], skip_invalid=True)
+    assert [info.filename for info in parsed] == filenames
+    for info in parsed:
+        wheel = Wheel(info.filename)
+        assert (info.name, info.version, info.build_tag) == (
+            wheel.name,
+            wheel.version,
+            wheel.build_tag,
+        )
+        assert info.file_tags == wheel.file_tags
+        assert not hasattr(info, "__dict__")
+    assert parsed[1].pyversions == ("py2", "py3")
+    assert parsed[0].abis is parsed[1].abis
+    other = parse_wheel_filenames(["a-1-py3-none-any.whl"])[0]
+    assert other.abis[0] is parsed[0].abis[0]
+    with pytest.raises(InvalidWheelFilename):
+        parse_wheel_filenames(["six-1.16.0.tar.gz"])
+
+
+def test_target_python_tags_cache():
+    from pip_shims.compat import clear_tags_cache, get_target_python_tags
+
+    clear_tags_cache()
+    first = TargetPython(py_version_info=(3, 8), platforms=["linux_x86_64"])
+    second = TargetPython(py_version_info=(3, 8), platforms=["linux_x86_64"])
+    tags = get_target_python_tags(first)
+    assert isinstance(tags, tuple) and tags
+    assert get_target_python_tags(second) is tags
+    assert second.get_tags() is tags
+    other = TargetPython(py_version_info=(3, 9), platforms=["linux_x86_64"])
+    assert get_target_python_tags(other) != tags
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Requires forked processes")
+def test_build_many_in_parallel(tmpdir, monkeypatch):
+    import tempfile
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from pip_shims import compat
+
+    class StubReq(object):
+        def __init__(self, name):
+            self.name = name
+            self.link = None
+
+    def build_many(reqs, wheel_cache, build_options):
+        successes, failures = [], []
+        for req in reqs:
+            if req.name == "broken":
+                failures.append(req)
+                continue
+            req.link = "{}-{}.whl".format(req.name, os.getpid())
+            req.local_file_path = tempfile.gettempdir()
+            successes.append(req)
+        return successes, failures
+
+    def build(names):
+        reqs = [StubReq(name) for name in names]
+        successes, failures = compat.build_many_in_parallel(
+            build_many, reqs, [None, []], max_workers=2, temp_dir=tmpdir.strpath
+        )
+        return reqs, successes, failures
+
+    # other threads are running, so forking isn't safe and the build is sequential
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        _, successes, _ = build(["six", "idna"])
+    finally:
+        stop.set()
+        thread.join()
+    assert all(req.link.endswith("-{}.whl".format(os.getpid())) for req in successes)
+
+    monkeypatch.setattr(compat, "_can_fork_workers", lambda: True)
+    reqs, successes, failures = build(["six", "broken", "idna"])
+    assert [req.name for req in successes] == ["six", "idna"]
+    assert failures == [reqs[1]]
+    assert all(not req.link.endswith("-{}.whl".format(os.getpid())) for req in successes)
+    assert all(req.local_file_path.startswith(tmpdir.strpath) for req in successes)
+    # concurrent calls each build their own requirements
+    jobs = [["six", "idna"], ["attrs", "toml", "click"]]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(build, jobs))
+    for names, (_, successes, failures) in zip(jobs, results):
+        assert [req.name for req in successes] == names and failures == []
+        assert all(req.link.startswith(req.name + "-") for req in successes)
+
+
+def test_build_many_in_parallel_after_lease(tmpdir):
+    import multiprocessing
+    import threading
+
+    from pip_shims import compat
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("Parallel builds need to fork")
+    assert threading.active_count() == 1
+
+    class StubReq(object):
+        def __init__(self, name):
+            self.name = name
+            self.link = None
+
+    def build_many(reqs):
+        for req in reqs:
+            req.link = "{}-{}.whl".format(req.name, os.getpid())
+        return reqs, []
+
+    with compat.get_scratch_pool().lease() as scratch_dirs:
+        os.makedirs(os.path.join(scratch_dirs["build_dir"], "six", "build"))
+    # deleting the build tree mustn't leave a thread running that stops the fork
+    successes, _ = compat.build_many_in_parallel(
+        build_many, [StubReq("six"), StubReq("idna")], [], temp_dir=tmpdir.strpath
+    )
+    assert all(not req.link.endswith("-{}.whl".format(os.getpid())) for req in successes)
+    assert threading.active_count() == 1
+
+
+def test_wheel_build_cache(tmpdir, monkeypatch):
+    import time
+
+    from pip_shims.compat import WheelBuildCache
+
+    sdist = tmpdir.join("six-1.16.0.tar.gz")
+    sdist.write("source")
+    mirror = tmpdir.join("mirror-six-1.16.0.tar.gz")
+    mirror.write("source")
+    cache = WheelBuildCache(tmpdir.join("cache").strpath, max_size=9)
+    key = cache.get_key(cache.hash_file(sdist.strpath), build_requires=["setuptools"])
+    assert cache.get(key) is None
+    mirror_key = cache.get_key(
+        cache.hash_file(mirror.strpath), build_requires=["setuptools"]
+    )
+    assert mirror_key == key
+    assert key != cache.get_key(cache.hash_file(sdist.strpath), build_options=["-O2"])
+    wheel = tmpdir.join("six-1.16.0-py3-none-any.whl")
+    wheel.write("wheel")
+    cached = cache.publish(key, wheel.strpath)
+    assert cached != wheel.strpath and cache.get(key) == cached
+    time.sleep(0.01)
+    other_key = cache.get_key("0" * 64)
+    cache.publish(other_key, wheel.strpath)
+    # only one 5 byte wheel fits, so the least recently used one is evicted
+    assert cache.get(key) is None and cache.get(other_key) is not None
+    # the size is tracked as wheels are published, so the cache is only walked
+    # again once it grows beyond max_size
+    cache.max_size = 100
+    monkeypatch.setattr(os, "walk", lambda *args: pytest.fail("walked the cache"))
+    cache.publish(cache.get_key("1" * 64), wheel.strpath)
+
+
+def test_wheel_build_cache_key_uses_installed_versions(tmpdir):
+    import packaging
+
+    from pip_shims.compat import WheelBuildCache
+
+    class StubBuildEnv(object):
+        def __init__(self, lib_dir):
+            self._lib_dirs = [lib_dir]
+
+    class StubReq(object):
+        def __init__(self, build_env=None, pyproject_requires=None):
+            self.build_env = build_env
+            self.pyproject_requires = pyproject_requires
+
+    def make_build_env(name, setuptools_version):
+        lib_dir = tmpdir.mkdir(name)
+        dist_info = lib_dir.mkdir("setuptools-{}.dist-info".format(setuptools_version))
+        dist_info.join("METADATA").write(
+            "Metadata-Version: 2.1\nName: setuptools\nVersion: {}\n".format(
+                setuptools_version
+            )
+        )
+        return StubBuildEnv(lib_dir.strpath)
+
+    cache = WheelBuildCache(tmpdir.join("cache").strpath)
+    declared = ["setuptools>=40.8"]
+    old = StubReq(make_build_env("old", "68.0.0"), declared)
+    new = StubReq(make_build_env("new", "69.0.0"), declared)
+    assert cache.get_build_requires(old) == ["setuptools==68.0.0"]
+    assert cache.get_build_requires(new) == ["setuptools==69.0.0"]
+    # without an isolated build environment the running environment's versions apply
+    host = StubReq(pyproject_requires=["packaging>=20", "not-installed-anywhere"])
+    assert cache.get_build_requires(host) == [
+        "not-installed-anywhere",
+        "packaging=={}".format(packaging.__version__),
+    ]
+
+
+@contextlib.contextmanager
+def serve_directory(path):
+    import http.server
+    import threading
+
+    class QuietHandler(http.server.SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    handler = partial(QuietHandler, directory=path)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield "http://127.0.0.1:{}/".format(server.server_address[1])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unpack_many(tmpdir):
+    import tarfile
+
+    from pip_shims import unpack_many
+
+    served = tmpdir.mkdir("served")
+    source = tmpdir.mkdir("source").mkdir("six-1.16.0")
+    source.join("setup.py").write("")
+    with tarfile.open(served.join("six-1.16.0.tar.gz").strpath, "w:gz") as archive:
+        archive.add(source.strpath, arcname="six-1.16.0")
+    with serve_directory(served.strpath) as base_url:
+        links = [
+            Link(base_url + name) for name in ("six-1.16.0.tar.gz", "missing.tar.gz")
+        ]
+        results = unpack_many(
+            download_dir=tmpdir.mkdir("download").strpath, items=links, max_downloads=1
+        )
+    assert [result.link for result in results] == links
+    assert results[0].error is None and results[1].error is not None
+    assert os.path.exists(os.path.join(results[0].location, "setup.py"))
+    assert results[0].download_time > 0 and results[0].unpack_time > 0
+
+
+def test_stream_download(tmpdir, monkeypatch):
+    import hashlib
+
+    from pip_shims import Hashes, HashMismatch, stream_download
+
+    served = tmpdir.mkdir("served")
+    served.join("six-1.16.0-py2.py3-none-any.whl").write_binary(b"wheel")
+    digest = hashlib.new(FAVORITE_HASH, b"wheel").hexdigest()
+    download_dir = tmpdir.mkdir("download")
+    session = get_session(install_cmd=InstallCommand())
+    with serve_directory(served.strpath) as base_url:
+        link = Link(base_url + "six-1.16.0-py2.py3-none-any.whl")
+        with pytest.raises(HashMismatch):
+            stream_download(
+                link, download_dir.strpath, session, hashes=Hashes({"sha256": ["0"]})
+            )
+        assert download_dir.listdir() == []
+        download = stream_download(
+            link,
+            download_dir.strpath,
+            session,
+            hashes=Hashes({FAVORITE_HASH: [digest]}),
+            hash_names=[FAVORITE_HASH, "md5"],
+        )
+        assert download.digests[FAVORITE_HASH] == digest
+        assert download.digests["md5"] == hashlib.md5(b"wheel").hexdigest()
+        download_dir.join(link.filename).remove()
+        # the streamed file is verified once, and never read again by pip
+        monkeypatch.setattr(Hashes, "check_against_path", pytest.fail)
+        ireq = install_req_from_line(
+            "six @ {}#{}={}".format(link.url, FAVORITE_HASH, digest)
+        )
+        shim_unpack(
+            download_dir=download_dir.strpath,
+            ireq=ireq,
+            location=tmpdir.mkdir("src").strpath,
+            session=session,
+            stream_hashes=True,
+        )
+    assert download_dir.join(link.filename).read_binary() == b"wheel"
+
+
+def test_unpack_many_streams_through_download_bound(tmpdir, monkeypatch):
+    import threading
+    import time
+
+    from pip_shims import compat, unpack_many
+
+    served = tmpdir.mkdir("served")
+    names = ["six-1.16.0-py2.py3-none-any.whl", "idna-3.4-py3-none-any.whl"]
+    for name in names:
+        served.join(name).write_binary(b"wheel")
+    lock, active, overlaps = threading.Lock(), [], []
+    real_stream_download = compat.stream_download
+
+    def slow_stream_download(*args, **kwargs):
+        with lock:
+            active.append(args)
+            overlaps.append(len(active))
+        try:
+            time.sleep(0.05)
+            return real_stream_download(*args, **kwargs)
+        finally:
+            with lock:
+                active.remove(args)
+
+    monkeypatch.setattr(compat, "stream_download", slow_stream_download)
+    download_dir = tmpdir.mkdir("download")
+    with serve_directory(served.strpath) as base_url:
+        results = unpack_many(
+            download_dir=download_dir.strpath,
+            items=[Link(base_url + name) for name in names],
+            max_downloads=1,
+            stream_hashes=True,
+        )
+    assert [result.error for result in results] == [None, None]
+    assert overlaps == [1, 1]
+    assert all(result.download_time >= 0.05 for result in results)
+    assert sorted(download_dir.listdir()) == sorted(
+        download_dir.join(name) for name in names
+    )
+
+
+def test_scratch_directory_pool(tmpdir):
+    from pip_shims import ScratchDirectoryPool
+
+    pool = ScratchDirectoryPool(base_dir=tmpdir.strpath, maxsize=1)
+    with ensure_resolution_dirs(scratch_pool=pool, src_dir="src") as kwargs:
+        assert kwargs["src_dir"] == "src"
+        with pool.lease() as other:
+            build_dir = other["build_dir"]
+            assert build_dir != kwargs["build_dir"]
+            os.makedirs(os.path.join(build_dir, "six", "build"))
+    # only one idle root is kept, and it is reset and leased again
+    assert len(pool) == 1
+    with pool.lease() as scratch_dirs:
+        assert scratch_dirs["build_dir"] == build_dir
+        assert os.listdir(build_dir) == []
+    pool.close()
+    assert tmpdir.listdir() == []